@@ -0,0 +1,133 @@
+from typing import Dict, Optional
+from feedback_columns import FeedbackColumns
+import numpy as np
+import time
+
+RATING_MIN, RATING_MAX = 1.0, 5.0
+
+class WeightTable:
+    """Immutable snapshot of adaptive weights for one feedback data version"""
+
+    def __init__(self, version: int, computed_at: float, combos: Dict[str, Dict[str, float]]):
+        self.version = version
+        self.computed_at = computed_at
+        self.combos = combos
+        # Flat lookup used on the prompt path
+        self.weights = {combo: stats["weight"] for combo, stats in combos.items()}
+
+    def weight(self, tone: str, platform: str, default: float = 1.0) -> float:
+        """Weight of a tone/platform combination, O(1)"""
+        return self.weights.get(f"{tone}_{platform}", default)
+
+
+class AdaptiveWeights:
+    """Adaptive prompt weights from time-decayed, shrunk combo ratings
+
+    Every rating is weighted by exp decay with the given half-life. Each
+    tone/platform combo's mean is shrunk toward a prior built from its tone
+    and platform means (themselves shrunk toward the global mean), with
+    prior_strength pseudo-observations, and gets a normal-approximation
+    confidence interval from its effective sample size. All combos are
+    computed at once with bincount over the columnar store.
+
+    Ages are measured from the newest entry, so a store that has stopped
+    receiving feedback keeps its weights instead of decaying into the prior.
+    """
+
+    def __init__(self, half_life_days: float = 90.0, prior_strength: float = 5.0,
+                 z: float = 1.96, max_age_s: float = 3600.0):
+        self.half_life_s = half_life_days * 86400
+        self.prior_strength = prior_strength
+        self.z = z
+        self.max_age_s = max_age_s
+
+    def is_fresh(self, table: Optional[WeightTable], version: int) -> bool:
+        """Whether a cached table can still be served for this data version"""
+        return (table is not None and table.version == version
+                and time.time() - table.computed_at < self.max_age_s)
+
+    def compute(self, columns: FeedbackColumns, version: int,
+                now: Optional[float] = None) -> WeightTable:
+        """Build the weight table for every combo present in the columns"""
+        computed_at = time.time()
+        if not len(columns) or not len(columns.platforms):
+            return WeightTable(version, computed_at, {})
+
+        if now is None:
+            now = float(columns.epochs.max())
+        k = self.prior_strength
+        n_tones, n_platforms = len(columns.tones), len(columns.platforms)
+
+        # Per-entry decay weights
+        ages = np.maximum(now - columns.epochs, 0.0)
+        decay = np.exp2(-ages / self.half_life_s)
+        ratings = columns.ratings
+
+        # One slot per (entry, platform)
+        slot_entries = np.repeat(np.arange(len(columns)), np.diff(columns.platform_indptr))
+        slot_platforms = columns.platform_codes.astype(np.int64)
+        slot_tones = columns.tone_codes[slot_entries].astype(np.int64)
+        slot_decay = decay[slot_entries]
+        slot_ratings = ratings[slot_entries]
+
+        # Global prior: decayed mean and variance over all entries
+        total_w = decay.sum()
+        if total_w == 0:
+            # Everything has decayed away; fall back to unweighted priors
+            decay = np.ones_like(decay)
+            slot_decay = decay[slot_entries]
+            total_w = decay.sum()
+        global_mean = (decay * ratings).sum() / total_w
+        global_var = (decay * (ratings - global_mean) ** 2).sum() / total_w
+
+        # Tone and platform priors, shrunk toward the global mean
+        tone_w = np.bincount(columns.tone_codes, weights=decay, minlength=n_tones)
+        tone_wr = np.bincount(columns.tone_codes, weights=decay * ratings, minlength=n_tones)
+        tone_prior = (tone_wr + k * global_mean) / (tone_w + k)
+
+        platform_w = np.bincount(slot_platforms, weights=slot_decay, minlength=n_platforms)
+        platform_wr = np.bincount(slot_platforms, weights=slot_decay * slot_ratings, minlength=n_platforms)
+        platform_prior = (platform_wr + k * global_mean) / (platform_w + k)
+
+        # Combo sums over the dense tone x platform grid
+        combos = slot_tones * n_platforms + slot_platforms
+        size = n_tones * n_platforms
+        counts = np.bincount(combos, minlength=size)
+        w = np.bincount(combos, weights=slot_decay, minlength=size)
+        w_sq = np.bincount(combos, weights=slot_decay ** 2, minlength=size)
+        wr = np.bincount(combos, weights=slot_decay * slot_ratings, minlength=size)
+        wr_sq = np.bincount(combos, weights=slot_decay * slot_ratings ** 2, minlength=size)
+
+        # Additive prior per combo, posterior mean with k pseudo-observations
+        prior = np.clip(
+            tone_prior[:, None] + platform_prior[None, :] - global_mean, RATING_MIN, RATING_MAX
+        ).ravel()
+        posterior = (wr + k * prior) / (w + k)
+
+        # Kish effective sample size and pooled variance for the interval
+        with np.errstate(divide="ignore", invalid="ignore"):
+            n_eff = np.where(w_sq > 0, w * w / w_sq, 0.0)
+            raw_mean = np.where(w > 0, wr / w, 0.0)
+            raw_var = np.where(w > 0, np.maximum(wr_sq / w - raw_mean ** 2, 0.0), 0.0)
+        variance = (n_eff * raw_var + k * global_var) / (n_eff + k)
+        half_width = self.z * np.sqrt(variance / (n_eff + k))
+        ci_low = np.clip(posterior - half_width, RATING_MIN, RATING_MAX)
+        ci_high = np.clip(posterior + half_width, RATING_MIN, RATING_MAX)
+
+        # Same 0.5-1.0 scale as before: 0.5 + 0.5 * rating / 5
+        weights = 0.5 + 0.5 * posterior / RATING_MAX
+
+        table = {}
+        for code in np.flatnonzero(counts):
+            tone_code, platform_code = divmod(int(code), n_platforms)
+            table[f"{columns.tones[tone_code]}_{columns.platforms[platform_code]}"] = {
+                "weight": float(weights[code]),
+                "mean": float(posterior[code]),
+                "ci_low": float(ci_low[code]),
+                "ci_high": float(ci_high[code]),
+                "prior": float(prior[code]),
+                "effective_samples": float(n_eff[code]),
+                "count": int(counts[code])
+            }
+
+        return WeightTable(version, computed_at, table)
@@ -0,0 +1,160 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from eval import ReferenceScorer
+from model_scheduler import DeadlineExceeded
+import threading
+import uuid
+import json
+import time
+
+
+class CandidateSelector:
+    """Speculative generation: run K candidates at once and keep the best one
+
+    Every candidate is the same prompt at a different temperature. Each
+    one is scored as soon as it finishes, with the quality gate's per-platform
+    checks (knowledge graph constraints plus the eval.py relevance and
+    hallucination heuristics). Candidates rank by sections passed, then by
+    mean relevance minus hallucination; ties go to the one that finished
+    first. A perfect candidate ends the selection at once. Otherwise the
+    selection ends when all candidates have finished, or at the deadline.
+    Candidates still queued at that point never call the model, and calls
+    still running are abandoned.
+
+    Every choice is appended to a JSON-lines log, with all candidates'
+    scores and texts, so ratings can later be joined with what was chosen.
+    """
+
+    def __init__(self, quality_gate, log_file: Optional[str] = "candidate_choices.jsonl",
+                 max_workers: int = 16, low_temperature: float = 0.3, high_temperature: float = 1.2):
+        self.quality_gate = quality_gate
+        self.log_file = log_file
+        self.low_temperature = low_temperature
+        self.high_temperature = high_temperature
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="candidate")
+        self._log_lock = threading.Lock()
+
+    def temperatures(self, k: int) -> List[float]:
+        """K temperatures spread evenly from low to high"""
+        if k == 1:
+            return [self.low_temperature]
+        step = (self.high_temperature - self.low_temperature) / (k - 1)
+        return [round(self.low_temperature + i * step, 2) for i in range(k)]
+
+    def select(self, ad_text: str, platforms: List[str], k: int,
+               generate: Callable[[float, threading.Event, Dict[str, float]], Optional[str]],
+               deadline: float, context: Optional[Dict[str, any]] = None) -> Tuple[str, Dict[str, any]]:
+        """Best candidate text and a selection report
+
+        `generate` receives a temperature, an event that is set once the
+        selection is over and a dict for its timings (e.g. queue_wait_ms),
+        which are reported with the candidate. It returns the generated
+        text, or None if it noticed the event before calling the model.
+        `deadline` is a time.perf_counter() value.
+        """
+        started = time.perf_counter()
+        scorer = ReferenceScorer(ad_text)
+        cancelled = threading.Event()
+        futures = {}
+        for i, temperature in enumerate(self.temperatures(k)):
+            timings = {}
+            futures[self._executor.submit(generate, temperature, cancelled, timings)] = (i, temperature, timings)
+
+        candidates = []
+        best = None
+        errors = []
+        pending = set(futures)
+        while pending and (best is None or not best["perfect"]):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, temperature, timings = futures[future]
+                candidate = {
+                    "index": index,
+                    "temperature": temperature,
+                    **timings,
+                    "finished_ms": round((time.perf_counter() - started) * 1000, 2)
+                }
+                try:
+                    text = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    candidates.append({**candidate, "error": str(e)})
+                    continue
+                if text is None:
+                    continue
+                candidate.update(self.score(ad_text, platforms, text, scorer))
+                candidate["text"] = text
+                candidates.append(candidate)
+                if best is None or candidate["score"] > best["score"]:
+                    best = candidate
+
+        # Stop the rest: queued ones are dropped, running ones skip or abandon the call
+        cancelled.set()
+        for future in pending:
+            future.cancel()
+
+        if best is None:
+            if errors and not pending:
+                raise errors[0]
+            raise DeadlineExceeded("No candidate finished before the deadline")
+
+        report = {
+            "choice_id": uuid.uuid4().hex,
+            "requested": k,
+            "finished": sum(1 for c in candidates if "text" in c),
+            "cancelled": len(pending),
+            "chosen": best["index"],
+            "temperature": best["temperature"],
+            "early_stop": best["perfect"] and bool(pending),
+            "selection_ms": round((time.perf_counter() - started) * 1000, 2),
+            "candidates": [
+                {key: value for key, value in c.items() if key not in ("text", "sections", "perfect")}
+                for c in candidates
+            ]
+        }
+        self._log(report, candidates, context or {})
+        return best["text"], report
+
+    def score(self, ad_text: str, platforms: List[str], text: str,
+              scorer: ReferenceScorer) -> Dict[str, any]:
+        """Quality gate review of a candidate, reduced to a sortable score"""
+        sections = self.quality_gate.review(ad_text, platforms, text, scorer)
+        passed = sum(1 for r in sections.values() if r["passed"])
+        quality = sum(r["relevance"] - r["hallucination"] for r in sections.values()) / max(len(sections), 1)
+        return {
+            "score": (passed, round(quality, 6)),
+            "passed_sections": passed,
+            "quality": round(quality, 4),
+            "perfect": passed == len(platforms) and all(
+                r["relevance"] == 1.0 and r["hallucination"] == 0.0 for r in sections.values()
+            ),
+            "sections": sections
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _log(self, report: Dict[str, any], candidates: List[Dict[str, any]], context: Dict[str, any]):
+        if not self.log_file:
+            return
+        record = {
+            "choice_id": report["choice_id"],
+            "timestamp": datetime.now().isoformat(),
+            **context,
+            "chosen": report["chosen"],
+            "early_stop": report["early_stop"],
+            "cancelled": report["cancelled"],
+            "selection_ms": report["selection_ms"],
+            "candidates": [
+                {key: value for key, value in c.items() if key not in ("sections", "perfect")}
+                for c in candidates
+            ]
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._log_lock:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(line)
@@ -0,0 +1,148 @@
+from typing import List, Optional, Sequence
+from starlette.datastructures import Headers, MutableHeaders
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Server preference order; br only when the brotli package is installed
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+GZIP_LEVEL = 6
+# Quality 4 keeps brotli's CPU cost near gzip's for dynamic responses
+BROTLI_QUALITY = 4
+
+
+def available(encodings: Sequence[str]) -> List[str]:
+    """The requested encodings this process can produce, in order"""
+    return [encoding for encoding in encodings if encoding in ENCODINGS]
+
+
+def choose_encoding(accept_encoding: Optional[str], encodings: Sequence[str]) -> Optional[str]:
+    """First of `encodings` the client accepts with a non-zero q-value"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk, so streams stay live"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def mark_encoded(headers: MutableHeaders, encoding: str):
+    """Headers of a body compressed with `encoding`"""
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        # Same content, different bytes
+        headers["ETag"] = "W/" + etag
+
+
+class CompressionMiddleware:
+    """Compress JSON, NDJSON and text responses with brotli or gzip
+
+    The encoding is negotiated from Accept-Encoding in the order given.
+    Complete bodies smaller than minimum_size are sent as they are;
+    streamed bodies are compressed chunk by chunk. Responses that already
+    have a Content-Encoding are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, encodings: Sequence[str] = ENCODINGS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available(encodings)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                data = compressor.chunk(body) if more_body else compressor.chunk(body) + compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(scope=start)
+            content_type = headers.get("content-type", "")
+            if ("content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            mark_encoded(headers, encoding)
+            if more_body:
+                compressor = _StreamCompressor(encoding)
+                del headers["Content-Length"]
+                data = compressor.chunk(body)
+            else:
+                data = compress(body, encoding)
+                headers["Content-Length"] = str(len(data))
+            await send(start)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,10 +1,20 @@
 from typing import Dict, List, Set, Tuple, Optional
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
+from shared_state import read_snapshot, write_snapshot
+import numpy as np
+import threading
+import hashlib
+import json
+import os
+
+# Tone -> platform relationships whose weights are learned from feedback
+LEARNED_RELATIONSHIPS = ("highly_compatible", "moderately_compatible")
 
 class EnhancedKnowledgeGraph:
     """Enhanced Knowledge Graph with traversal capabilities"""
     
-    def __init__(self):
+    def __init__(self, snapshot_path: Optional[str] = None, prior_strength: float = 10.0,
+                 min_change: float = 0.005, cache_size: int = 1024):
         # Node properties
         self.nodes = {
             # Tones
@@ -90,6 +100,29 @@ class EnhancedKnowledgeGraph:
         self.edges = defaultdict(list)
         self._build_relationships()
         
+        # Hand-set weights that feedback is blended with
+        self.base_weights = {
+            (from_node, edge["to"]): edge["weight"]
+            for from_node, edges in self.edges.items() for edge in edges
+        }
+        self.prior_strength = prior_strength
+        self.min_change = min_change
+        self.learned: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.learned_from: Optional[int] = None
+        self.version = 0
+        
+        # Memoized paths and recommendations, with the edges each one read.
+        # Keys come from request tones and platforms, so the least recently
+        # used entries are evicted past cache_size
+        self._cache_lock = threading.RLock()
+        self._cache: "OrderedDict[Tuple[str, str, str], Tuple[any, Set[Tuple[str, str]]]]" = OrderedDict()
+        self.cache_size = cache_size
+        self._dependents: Dict[Tuple[str, str], Set[Tuple[str, str, str]]] = defaultdict(set)
+        
+        self.snapshot_path = snapshot_path
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+        
     def _build_relationships(self):
         """Build graph relationships"""
         # Tone -> Platform compatibility
@@ -124,6 +157,188 @@ class EnhancedKnowledgeGraph:
             "weight": weight
         })
         
+    def learn_from_feedback(self, weight_table) -> List[Tuple[str, str]]:
+        """Blend compatibility edge weights with feedback; returns the edges that changed
+
+        The combo's shrunk, time-decayed mean rating from the adaptive weight
+        table is mapped onto 0-1 and blended with the hand-set weight, which
+        counts as prior_strength observations against the combo's effective
+        sample size. Weights are recomputed from the hand-set ones each time,
+        so they never drift, and moves smaller than min_change are ignored.
+        Only cached paths and recommendations that read a changed edge are
+        dropped. Saves a snapshot when a snapshot path is set.
+        """
+        if weight_table.version == self.learned_from:
+            return []
+        
+        changed = []
+        with self._cache_lock:
+            for from_node, edges in self.edges.items():
+                for edge in edges:
+                    if edge["relationship"] not in LEARNED_RELATIONSHIPS:
+                        continue
+                    key = (from_node, edge["to"])
+                    base = self.base_weights.get(key, edge["weight"])
+                    stats = weight_table.combos.get(f"{from_node}_{edge['to']}")
+                    if stats is None:
+                        weight = base
+                        self.learned.pop(key, None)
+                    else:
+                        observed = (stats["mean"] - 1.0) / 4.0
+                        evidence = stats["effective_samples"]
+                        weight = round((self.prior_strength * base + evidence * observed)
+                                       / (self.prior_strength + evidence), 4)
+                        self.learned[key] = {
+                            "base_weight": base,
+                            "weight": weight,
+                            "observed": round(observed, 4),
+                            "evidence": round(evidence, 2)
+                        }
+                    if weight != edge["weight"] and (abs(weight - edge["weight"]) >= self.min_change or stats is None):
+                        edge["weight"] = weight
+                        changed.append(key)
+                    if key in self.learned:
+                        # Report the weight actually in use
+                        self.learned[key]["weight"] = edge["weight"]
+            self.learned_from = weight_table.version
+            if changed:
+                self.version += 1
+                self._invalidate(changed)
+                
+        if changed and self.snapshot_path:
+            self.save_snapshot(self.snapshot_path)
+        return changed
+        
+    def feedback_adjustments(self, min_delta: float = 0.05) -> List[Dict[str, any]]:
+        """Learned edges that moved at least min_delta from their hand-set weight, largest first"""
+        adjustments = [
+            {"tone": from_node, "platform": to_node, **learned}
+            for (from_node, to_node), learned in self.learned.items()
+            if abs(learned["weight"] - learned["base_weight"]) >= min_delta
+        ]
+        return sorted(adjustments, key=lambda a: -abs(a["weight"] - a["base_weight"]))
+        
+    def save_snapshot(self, path: str):
+        """Persist the edges and learning state as a memory-mappable snapshot file"""
+        with self._cache_lock:
+            tables, meta = self.to_tables()
+        meta["base"] = self._base_fingerprint()
+        write_snapshot(path, meta["version"], tables, meta)
+        
+    def load_snapshot(self, path: str) -> bool:
+        """Load a snapshot saved by save_snapshot; False if it was built from other hand-set weights"""
+        version, tables, meta = read_snapshot(path)
+        if meta.get("base") != self._base_fingerprint():
+            return False
+        self.load_tables(tables, meta)
+        return True
+        
+    def _base_fingerprint(self) -> str:
+        edges = sorted([from_node, to_node, weight] for (from_node, to_node), weight in self.base_weights.items())
+        return hashlib.blake2b(json.dumps(edges).encode("utf-8"), digest_size=16).hexdigest()
+        
+    def _cached(self, key: Tuple[str, str, str], compute):
+        """Return the memoized value for key, computing (value, edges read) on a miss"""
+        with self._cache_lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+            version = self.version
+        if hit is not None:
+            return hit[0]
+        value, deps = compute()
+        with self._cache_lock:
+            # Not stored if the weights changed while it was computed
+            if self.version == version and key not in self._cache:
+                self._cache[key] = (value, deps)
+                for dep in deps:
+                    self._dependents[dep].add(key)
+                while len(self._cache) > self.cache_size:
+                    self._evict(next(iter(self._cache)))
+        return value
+        
+    def _invalidate(self, changed: List[Tuple[str, str]]):
+        """Drop cached entries that read any of the changed edges; caller holds the lock"""
+        for dep in changed:
+            for key in list(self._dependents.get(dep, ())):
+                self._evict(key)
+                
+    def _evict(self, key: Tuple[str, str, str]):
+        """Drop one cached entry and its dependency links; caller holds the lock"""
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return
+        for dep in entry[1]:
+            keys = self._dependents.get(dep)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[dep]
+                        
+    def _clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self._dependents.clear()
+        
+    def to_tables(self) -> Tuple[Dict[str, np.ndarray], Dict[str, any]]:
+        """Edges as parallel arrays of node/relationship codes and weights"""
+        names, relationships = {}, {}
+        rows = []
+        for from_node, edges in self.edges.items():
+            for edge in edges:
+                rows.append((
+                    names.setdefault(from_node, len(names)),
+                    names.setdefault(edge["to"], len(names)),
+                    relationships.setdefault(edge["relationship"], len(relationships)),
+                    edge["weight"]
+                ))
+        columns = list(zip(*rows)) or [(), (), (), ()]
+        tables = {
+            "edge_from": np.array(columns[0], dtype=np.int32),
+            "edge_to": np.array(columns[1], dtype=np.int32),
+            "edge_relationship": np.array(columns[2], dtype=np.int32),
+            "edge_weight": np.array(columns[3], dtype=np.float64)
+        }
+        return tables, {
+            "nodes": list(names),
+            "relationships": list(relationships),
+            "version": self.version,
+            "learned": [[from_node, to_node, learned] for (from_node, to_node), learned in self.learned.items()]
+        }
+        
+    def load_tables(self, tables: Dict[str, np.ndarray], meta: Dict[str, any]):
+        """Replace the edges with ones exported by to_tables
+
+        If only weights differ, just the cached entries that read a changed
+        edge are dropped.
+        """
+        names, relationships = meta["nodes"], meta["relationships"]
+        edges = defaultdict(list)
+        rows = zip(tables["edge_from"].tolist(), tables["edge_to"].tolist(),
+                   tables["edge_relationship"].tolist(), tables["edge_weight"].tolist())
+        for from_code, to_code, relationship_code, weight in rows:
+            edges[names[from_code]].append({
+                "to": names[to_code],
+                "relationship": relationships[relationship_code],
+                "weight": weight
+            })
+            
+        with self._cache_lock:
+            old = {(from_node, edge["to"], edge["relationship"]): edge["weight"]
+                   for from_node, old_edges in self.edges.items() for edge in old_edges}
+            new = {(from_node, edge["to"], edge["relationship"]): edge["weight"]
+                   for from_node, new_edges in edges.items() for edge in new_edges}
+            self.edges = edges
+            self.version = meta.get("version", self.version + 1)
+            self.learned = {(from_node, to_node): learned for from_node, to_node, learned in meta.get("learned", [])}
+            # Weight table versions are local to the process that computed them,
+            # so the next learn_from_feedback relearns from this process's table
+            self.learned_from = None
+            if old.keys() != new.keys():
+                self._clear_cache()
+            else:
+                self._invalidate([key[:2] for key, weight in new.items() if old[key] != weight])
+        
     def traverse_bfs(self, start_node: str, max_depth: int = 2) -> Dict[str, List[Tuple[str, str, float]]]:
         """Breadth-first traversal to find related nodes"""
         visited = set()
@@ -152,6 +367,13 @@ class EnhancedKnowledgeGraph:
         
     def find_best_path(self, start: str, end: str) -> Optional[List[Tuple[str, str, float]]]:
         """Find the best path between two nodes using weighted edges"""
+        path = self._cached(("path", start, end), lambda: self._find_best_path(start, end))
+        return list(path) if path is not None else None
+        
+    def _find_best_path(self, start: str, end: str) -> Tuple[Optional[List[Tuple[str, str, float]]], Set[Tuple[str, str]]]:
+        # Every relaxed edge can change the result
+        deps = set()
+        
         # Simple Dijkstra-like approach
         distances = {node: float('inf') for node in self.nodes}
         distances[start] = 0
@@ -168,6 +390,7 @@ class EnhancedKnowledgeGraph:
             
             for edge in self.edges.get(current, []):
                 neighbor = edge["to"]
+                deps.add((current, neighbor))
                 weight = 1 - edge["weight"]  # Convert to distance (lower is better)
                 distance = distances[current] + weight
                 
@@ -177,21 +400,28 @@ class EnhancedKnowledgeGraph:
                     
         # Reconstruct path
         if end not in previous:
-            return None
+            return None, deps
             
         path = []
         current = end
         while current != start:
             if current not in previous:
-                return None
+                return None, deps
             prev_node, rel, weight = previous[current]
             path.append((prev_node, rel, weight))
             current = prev_node
             
-        return list(reversed(path))
+        return list(reversed(path)), deps
         
     def get_recommendations(self, tone: str, platform: str) -> Dict[str, any]:
         """Get recommendations based on tone and platform"""
+        recommendations = self._cached(("recommendations", tone, platform),
+                                       lambda: self._get_recommendations(tone, platform))
+        return {key: list(value) if isinstance(value, list) else value
+                for key, value in recommendations.items()}
+        
+    def _get_recommendations(self, tone: str, platform: str) -> Tuple[Dict[str, any], Set[Tuple[str, str]]]:
+        deps = {(tone, platform)}
         recommendations = {
             "compatibility_score": 0,
             "suggested_elements": [],
@@ -212,7 +442,8 @@ class EnhancedKnowledgeGraph:
         # Extract creative type recommendations
         for node, paths in tone_paths.items():
             if self.nodes.get(node, {}).get("type") == "creative_type":
-                for _, rel, weight in paths:
+                for from_node, rel, weight in paths:
+                    deps.add((from_node, node))
                     if rel == "suitable_for" and weight > 0.7:
                         recommendations["creative_types"].append(node)
                         
@@ -228,7 +459,7 @@ class EnhancedKnowledgeGraph:
         if platform_props.get("char_limit", float('inf')) < 100:
             recommendations["suggested_elements"].append("Keep message extremely concise")
             
-        return recommendations
+        return recommendations, deps
         
     def explain_relationship(self, node1: str, node2: str) -> str:
         """Explain the relationship between two nodes"""
@@ -1,22 +1,24 @@
 from enhanced_retriever import EnhancedRetriever
-from enhanced_knowledge_graph import EnhancedKnowledgeGraph
+from enhanced_knowledge_graph import EnhancedKnowledgeGraph, LEARNED_RELATIONSHIPS
 from feedback_analyzer import FeedbackAnalyzer
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class EnhancedPromptBuilder:
     """Enhanced prompt builder with all advanced features integrated"""
     
-    def __init__(self):
-        self.retriever = EnhancedRetriever()
-        self.knowledge_graph = EnhancedKnowledgeGraph()
-        self.feedback_analyzer = FeedbackAnalyzer()
+    def __init__(self, retriever: Optional[EnhancedRetriever] = None,
+                 knowledge_graph: Optional[EnhancedKnowledgeGraph] = None,
+                 feedback_analyzer: Optional[FeedbackAnalyzer] = None):
+        # Components can be built elsewhere (e.g. in parallel at start-up) and passed in
+        self.retriever = retriever or EnhancedRetriever()
+        self.knowledge_graph = knowledge_graph or EnhancedKnowledgeGraph()
+        self.feedback_analyzer = feedback_analyzer or FeedbackAnalyzer()
         
     def build_adaptive_prompt(self, ad_text: str, tone: str, platforms: List[str]) -> str:
         """Build an adaptive prompt using all enhancement layers"""
         
         # 1. Get enhanced RAG results with relevance scores
-        rag_results = self.retriever.retrieve_with_relevance(tone, platforms)
-        formatted_guidance = self.retriever.format_guidance_with_scores(rag_results)
+        rag_results, formatted_guidance = self.retriever.retrieve_guidance(tone, platforms)
         
         # 2. Get knowledge graph insights with traversal
         kg_insights = []
@@ -42,8 +44,8 @@ class EnhancedPromptBuilder:
         
         kg_insights_str = "\n".join(kg_insights)
         
-        # 3. Get adaptive weights from feedback analysis
-        weights = self.feedback_analyzer.get_adaptive_weights()
+        # 3. Get adaptive weights from the cached, versioned weight table
+        weight_table = self.feedback_analyzer.get_weight_table()
         
         # 4. Add performance insights if available
         analysis = self.feedback_analyzer.analyze_patterns()
@@ -64,8 +66,7 @@ class EnhancedPromptBuilder:
         # Apply adaptive weights to emphasize better-performing combinations
         weight_notes = []
         for platform in platforms:
-            combo_key = f"{tone}_{platform}"
-            weight = weights.get(combo_key, 1.0)
+            weight = weight_table.weight(tone, platform)
             if weight > 0.8:
                 weight_notes.append(f"  - {platform}: High confidence (historical success)")
             elif weight < 0.6:
@@ -104,6 +105,46 @@ Provide a separate, optimized version for each platform:
 {''.join([f'{p}:\n<Your rewritten ad text here>\n\n' for p in platforms])}
 
 Remember: Each platform version should be uniquely tailored while maintaining brand consistency.
+"""
+        
+        return prompt
+    
+    def build_repair_prompt(self, ad_text: str, tone: str, failing: Dict[str, List[str]]) -> str:
+        """Build a prompt that rewrites only the platform sections that failed quality checks"""
+        section_notes = []
+        
+        for platform, issues in failing.items():
+            props = self.knowledge_graph.nodes.get(platform, {}).get("properties", {})
+            section_notes.append(f"\n{platform}:")
+            section_notes.extend([f"  - Problem: {issue}" for issue in issues])
+            
+            if "char_limit" in props:
+                section_notes.append(f"  - Must be at most {props['char_limit']} characters")
+            if props.get("emoji_friendly") is False:
+                section_notes.append("  - Do not use emojis")
+        
+        section_notes_str = "\n".join(section_notes)
+        output_format = "".join([f"{p}:\n<Your rewritten ad text here>\n\n" for p in failing])
+        
+        prompt = f"""
+You are an expert ad copywriter. A previous rewrite failed automatic quality checks for some platforms.
+
+TASK: Rewrite the following ad text in a {tone} tone, only for the platforms listed below.
+
+ORIGINAL AD TEXT: "{ad_text}"
+
+=== FAILED CHECKS ===
+{section_notes_str}
+
+=== INSTRUCTIONS ===
+1. Fix every problem listed for each platform
+2. Keep the core message and do not add claims, numbers or offers that are not in the original ad
+3. Respect each platform's constraints exactly
+
+OUTPUT FORMAT:
+Provide only the listed platforms, in this format:
+
+{output_format}
 """
         
         return prompt
@@ -123,9 +164,22 @@ Remember: Each platform version should be uniquely tailored while maintaining br
             tone, platform = pattern["pattern"].split("_")
             suggestions.append(f"Review and update guidelines for {tone} tone on {platform}")
             
-        # Suggest new relationships for KG
-        high_performers = analysis.get("high_performing_patterns", [])
-        if high_performers:
-            suggestions.append("Consider strengthening KG relationships for high-performing combinations")
+        # Report compatibility weights the KG has learned from feedback
+        for adjustment in self.knowledge_graph.feedback_adjustments():
+            direction = "raised" if adjustment["weight"] > adjustment["base_weight"] else "lowered"
+            suggestions.append(
+                f"KG {direction} {adjustment['tone']} → {adjustment['platform']} compatibility from "
+                f"{adjustment['base_weight']:.2f} to {adjustment['weight']:.2f} based on feedback"
+            )
+            
+        # High performers on edges the KG doesn't learn need a human to revisit them
+        for pattern in analysis.get("high_performing_patterns", []):
+            tone, platform = pattern["pattern"].split("_")
+            for edge in self.knowledge_graph.edges.get(tone, []):
+                if edge["to"] == platform and edge["relationship"] not in LEARNED_RELATIONSHIPS:
+                    suggestions.append(
+                        f"{tone} tone on {platform} performs well (avg: {pattern['average_rating']:.2f}) "
+                        f"but the KG marks it {edge['relationship']} - review that relationship"
+                    )
             
         return suggestions 
\ No newline at end of file
@@ -1,32 +1,63 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import numpy as np
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from itertools import permutations
+import threading
+import hashlib
+import time
+import os
 import re
 
 class EnhancedRetriever:
     """Enhanced RAG with semantic similarity scoring"""
     
-    def __init__(self, guideline_path: str = "tone_guidelines.txt"):
+    def __init__(self, guideline_path: str = "tone_guidelines.txt", cache_size: int = 256,
+                 reload_interval_s: Optional[float] = 1.0):
         self.guideline_path = guideline_path
-        self.guidelines = self._load_guidelines()
+        # Stat before reading, so a write during the read is picked up later
+        self._guideline_stat = self._stat_guidelines()
+        self.guidelines, self.corpus_version = self._load_guidelines()
         self.embeddings_cache = {}
         
-    def _load_guidelines(self) -> Dict[str, List[str]]:
-        """Load guidelines from file"""
+        # The guideline file is checked for changes at most this often (None: never)
+        self.reload_interval_s = reload_interval_s
+        self._next_reload_check = time.monotonic() + (reload_interval_s or 0)
+        self._reload_lock = threading.Lock()
+        
+        # (corpus version, tone, platforms) -> (retrieval result, formatted guidance)
+        self.cache_size = cache_size
+        self._results: "OrderedDict[Tuple[str, str, Tuple[str, ...]], Tuple[Dict[str, any], str]]" = OrderedDict()
+        self._results_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+    def _load_guidelines(self) -> Tuple[Dict[str, List[str]], str]:
+        """Load guidelines from file, with the corpus version"""
         guidelines = defaultdict(list)
         current_key = None
         
-        with open(self.guideline_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                if ":" in line:
-                    current_key = line.replace(":", "").strip().lower()
-                elif current_key:
-                    guidelines[current_key].append(line.strip("- ").strip())
+        with open(self.guideline_path, "rb") as f:
+            raw = f.read()
+        # Version of the corpus, part of every retrieval cache key
+        corpus_version = hashlib.blake2b(raw, digest_size=8).hexdigest()
+        
+        for line in raw.decode("utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if ":" in line:
+                current_key = line.replace(":", "").strip().lower()
+            elif current_key:
+                guidelines[current_key].append(line.strip("- ").strip())
         
-        return dict(guidelines)
+        return dict(guidelines), corpus_version
+    
+    def _stat_guidelines(self):
+        try:
+            stat = os.stat(self.guideline_path)
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
     
     def _simple_embedding(self, text: str) -> np.ndarray:
         """Create simple word-based embeddings for semantic similarity"""
@@ -58,6 +89,64 @@ class EnhancedRetriever:
         
         return dot_product / (norm1 * norm2)
     
+    def _cached_embedding(self, text: str) -> np.ndarray:
+        """Embedding of a guideline, computed once"""
+        embedding = self.embeddings_cache.get(text)
+        if embedding is None:
+            embedding = self.embeddings_cache[text] = self._simple_embedding(text)
+        return embedding
+    
+    def build_index(self):
+        """Embed every guideline up front so searches don't pay for it"""
+        for items in self.guidelines.values():
+            for item in items:
+                self._cached_embedding(item)
+    
+    def embedding_table(self) -> Tuple[List[str], np.ndarray]:
+        """Every guideline with its embedding as one row of a matrix"""
+        self.build_index()
+        texts = [item for items in self.guidelines.values() for item in items]
+        matrix = np.array([self.embeddings_cache[text] for text in texts], dtype=np.float32)
+        return texts, matrix.reshape(len(texts), -1)
+    
+    def load_embeddings(self, texts: List[str], matrix: np.ndarray, corpus_version: Optional[str] = None):
+        """Use rows of a shared matrix as the cached guideline embeddings (no copy)"""
+        self.embeddings_cache = {text: matrix[i] for i, text in enumerate(texts)}
+        if corpus_version != self.corpus_version:
+            # Built from another corpus: cached retrievals may not match these embeddings
+            self.clear_cache()
+    
+    def reload_guidelines(self) -> bool:
+        """Re-read the guideline file; True if the corpus changed"""
+        with self._reload_lock:
+            stat = self._stat_guidelines()
+            guidelines, version = self._load_guidelines()
+            self._guideline_stat = stat
+            if version == self.corpus_version:
+                return False
+            with self._results_lock:
+                # Corpus and version change together, so a cache key never
+                # pairs one corpus's version with the other's results
+                self.guidelines, self.corpus_version = guidelines, version
+                self.embeddings_cache = {}
+                self._results.clear()
+            return True
+    
+    def check_guidelines(self) -> bool:
+        """Reload the guidelines if the file changed, checking at most once per reload_interval_s"""
+        now = time.monotonic()
+        if self.reload_interval_s is None or now < self._next_reload_check:
+            return False
+        self._next_reload_check = now + self.reload_interval_s
+        stat = self._stat_guidelines()
+        if stat is None or stat == self._guideline_stat:
+            return False
+        try:
+            return self.reload_guidelines()
+        except (OSError, UnicodeDecodeError):
+            # Mid-write or replaced; keep serving the current corpus and retry later
+            return False
+    
     def semantic_search(self, query: str, top_k: int = 5) -> List[Tuple[str, str, float]]:
         """Perform semantic search across all guidelines"""
         query_embedding = self._simple_embedding(query)
@@ -65,7 +154,7 @@ class EnhancedRetriever:
         
         for category, items in self.guidelines.items():
             for item in items:
-                item_embedding = self._simple_embedding(item)
+                item_embedding = self._cached_embedding(item)
                 similarity = self._cosine_similarity(query_embedding, item_embedding)
                 results.append((category, item, similarity))
         
@@ -73,8 +162,62 @@ class EnhancedRetriever:
         results.sort(key=lambda x: x[2], reverse=True)
         return results[:top_k]
     
+    def retrieve_guidance(self, tone: str, platforms: List[str]) -> Tuple[Dict[str, any], str]:
+        """Retrieval result and its formatted guidance, from a bounded LRU cache
+
+        Both depend only on the tone, the platforms (in order) and the
+        corpus, so they are computed once per corpus version. The result is
+        shared between callers and must not be modified. Edits to the
+        guideline file are picked up within reload_interval_s.
+        """
+        self.check_guidelines()
+        with self._results_lock:
+            key = (self.corpus_version, tone, tuple(platforms))
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+            
+        result = self._retrieve_with_relevance(tone, platforms)
+        cached = (result, self.format_guidance_with_scores(result))
+        with self._results_lock:
+            # Not stored if the corpus was reloaded meanwhile
+            if key[0] == self.corpus_version:
+                self._results[key] = cached
+                while len(self._results) > self.cache_size:
+                    self._results.popitem(last=False)
+        return cached
+    
+    def precompute(self, tones: List[str], platforms: List[str]) -> int:
+        """Fill the cache for every tone and ordered, non-empty platform selection"""
+        count = 0
+        for tone in tones:
+            for size in range(1, len(platforms) + 1):
+                for selection in permutations(platforms, size):
+                    self.retrieve_guidance(tone, list(selection))
+                    count += 1
+        return count
+    
+    def clear_cache(self):
+        with self._results_lock:
+            self._results.clear()
+    
+    def cache_stats(self) -> Dict[str, any]:
+        return {
+            "entries": len(self._results),
+            "max_entries": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "corpus_version": self.corpus_version
+        }
+    
     def retrieve_with_relevance(self, tone: str, platforms: List[str]) -> Dict[str, any]:
         """Enhanced retrieval with relevance scoring"""
+        return self.retrieve_guidance(tone, platforms)[0]
+    
+    def _retrieve_with_relevance(self, tone: str, platforms: List[str]) -> Dict[str, any]:
         context_query = f"{tone} tone for {' '.join(platforms)} platforms"
         semantic_results = self.semantic_search(context_query)
         
@@ -0,0 +1,36 @@
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson when installed; JSON_BACKEND=stdlib forces the fallback, e.g. to compare them
+BACKEND = "orjson" if orjson is not None and os.getenv("JSON_BACKEND", "orjson") == "orjson" else "stdlib"
+
+
+def dumps(payload) -> bytes:
+    """Compact UTF-8 JSON; types JSON can't represent go through jsonable_encoder"""
+    if BACKEND == "orjson":
+        return orjson.dumps(
+            payload, default=jsonable_encoder,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        payload, default=jsonable_encoder, ensure_ascii=False, allow_nan=False,
+        indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps()
+
+    Endpoints that return one directly also skip FastAPI's jsonable_encoder
+    pass over the payload, which costs more than the encoding itself.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
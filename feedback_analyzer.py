@@ -1,109 +1,367 @@
 import json
 from datetime import datetime
-from typing import Dict, List, Tuple
-from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from adaptive_weights import AdaptiveWeights, WeightTable
+from feedback_columns import FeedbackColumns
+from feedback_rollups import FeedbackRollups
+import numpy as np
 import statistics
+import threading
+import math
+import time
+import sys
+
+_SQRT_BIT_WIDTH = 2 * sys.float_info.mant_dig + 3
+
+
+def _sqrt_of_frac(n: int, m: int) -> float:
+    """Correctly rounded square root of the fraction n / m"""
+    q = (n.bit_length() - m.bit_length() - _SQRT_BIT_WIDTH) // 2
+    if q >= 0:
+        root = _isqrt_of_frac(n, m << 2 * q) << q
+        return float(root)
+    return _isqrt_of_frac(n << -2 * q, m) / (1 << -q)
+
+
+def _isqrt_of_frac(n: int, m: int) -> int:
+    """Integer square root of n / m, with the low bit set when inexact"""
+    root = math.isqrt(n // m)
+    return root | (root * root * m != n)
+
 
 class FeedbackAnalyzer:
     """Analyze feedback patterns and provide improvement recommendations"""
     
-    def __init__(self, feedback_file: str = "feedback_store.json"):
+    def __init__(self, feedback_file: str = "feedback_store.json", load: bool = True):
         self.feedback_file = feedback_file
-        self.feedback_data = self._load_feedback()
-        
-    def _load_feedback(self) -> List[Dict]:
-        """Load feedback from JSON file"""
-        try:
-            with open(self.feedback_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
+        self.columns = FeedbackColumns(feedback_file)
+        self.rollups = FeedbackRollups()
+        self.adaptive_weights = AdaptiveWeights()
+        # Bumped on every recorded entry; caches derived from the data key on it
+        self.version = 0
+        self.updated_at = time.time()
+        self._weight_table: Optional[WeightTable] = None
+        # Unfiltered analysis of one data version, as (version, analysis)
+        self._pattern_analysis: Optional[Tuple[int, Dict[str, any]]] = None
+        self._analysis_lock = threading.Lock()
+        # One writer at a time; readers work on column views and never take it
+        self._write_lock = threading.RLock()
+        if load:
+            self._load_feedback()
+        
+    def _load_feedback(self):
+        """Load feedback from JSON file into a fresh columnar store and rollups
+
+        Both are filled on the side and swapped in once complete, so readers
+        never see a partly loaded store.
+        """
+        with self._write_lock:
+            columns = FeedbackColumns(self.feedback_file)
+            rollups = FeedbackRollups()
+            try:
+                for entry, span in FeedbackColumns.scan(self.feedback_file):
+                    self._fold(columns, rollups, entry, span)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                columns = FeedbackColumns(self.feedback_file)
+                rollups = FeedbackRollups()
+            self.columns, self.rollups = columns, rollups
+            self.version += 1
+            self.updated_at = time.time()
+            self._pattern_analysis = None
+            
+    @staticmethod
+    def _fold(columns: FeedbackColumns, rollups: FeedbackRollups, entry: Dict,
+              span: Optional[Tuple[int, int]] = None):
+        """Add one entry's analysis fields to the columns and rollups"""
+        timestamp = datetime.fromisoformat(entry.get("timestamp", "2024-01-01"))
+        tone = entry.get("tone", "unknown")
+        platforms = entry.get("platforms", [])
+        rating = entry.get("rating", 0)
+        
+        columns.append(timestamp, tone, platforms, rating, span)
+        rollups.add(timestamp, tone, platforms, rating)
+        
+    def _record(self, entry: Dict, span: Optional[Tuple[int, int]] = None):
+        """Add one entry to the live columns and rollups"""
+        with self._write_lock:
+            self._fold(self.columns, self.rollups, entry, span)
+            self.version += 1
+            self.updated_at = time.time()
+            self._pattern_analysis = None
+        
+    def add_feedback(self, entry: Dict, span: Optional[Tuple[int, int]] = None):
+        """Record a new feedback entry and update the rollups incrementally
+
+        span is the entry's byte range in the feedback file, if the caller wrote it.
+        """
+        self._record(entry, span)
+        
+    def reload(self):
+        """Load the feedback file again, replacing everything in memory"""
+        self._load_feedback()
+        
+    def refresh(self) -> int:
+        """Record entries appended to the feedback file by other processes
+
+        Returns the number of new entries. Only the part of the file after
+        the last known entry is parsed; if that entry is no longer in place
+        the file was replaced, and is reloaded whole.
+        """
+        with self._write_lock:
+            offset = self.columns.tail_offset()
+            if offset is None:
+                self.reload()
+                return len(self.columns)
+                
+            try:
+                entries = list(FeedbackColumns.scan(self.feedback_file, offset))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                return 0
+                
+            for entry, span in entries:
+                self._record(entry, span)
+            return len(entries)
+        
+    def to_snapshot(self) -> Tuple[Dict[str, np.ndarray], Dict[str, any]]:
+        """Columns, rollups and weight table as arrays plus JSON metadata"""
+        column_arrays, column_meta = self.columns.to_arrays()
+        rollup_arrays, rollup_meta = self.rollups.to_arrays()
+        table = self.get_weight_table()
+        
+        arrays = {f"columns.{name}": array for name, array in column_arrays.items()}
+        arrays.update({f"rollups.{name}": array for name, array in rollup_arrays.items()})
+        meta = {
+            "columns": column_meta,
+            "rollups": rollup_meta,
+            "weights": {"computed_at": table.computed_at, "combos": table.combos}
+        }
+        return arrays, meta
+        
+    def attach_snapshot(self, arrays: Dict[str, np.ndarray], meta: Dict[str, any], version: int):
+        """Serve analyses from a published snapshot instead of local state
+
+        The column arrays are used as given (typically read-only memory
+        maps), so nothing is copied and this analyzer must not record entries.
+        """
+        columns = FeedbackColumns.from_arrays(
+            self.feedback_file,
+            {name[len("columns."):]: array for name, array in arrays.items() if name.startswith("columns.")},
+            meta["columns"]
+        )
+        rollups = FeedbackRollups.from_arrays(
+            {name[len("rollups."):]: array for name, array in arrays.items() if name.startswith("rollups.")},
+            meta["rollups"]
+        )
+        with self._write_lock:
+            self.columns, self.rollups, self.version = columns, rollups, version
+            self.updated_at = time.time()
+            self._pattern_analysis = None
+            self._weight_table = WeightTable(version, meta["weights"]["computed_at"], meta["weights"]["combos"])
+        
+    @property
+    def feedback_data(self) -> List[Dict]:
+        """Full feedback entries, text fields included, read back from disk
+
+        This materializes every entry; the analyses work on self.columns.
+        """
+        return self.columns.load_entries()
+        
+    @staticmethod
+    def _group(codes: np.ndarray, ratings: np.ndarray, integral: bool) -> List[Tuple[int, Dict]]:
+        """Group ratings by code, in order of each code's first appearance"""
+        if len(codes) == 0:
             return []
             
-    def analyze_patterns(self) -> Dict[str, any]:
-        """Analyze patterns in feedback data"""
-        if not self.feedback_data:
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        sorted_ratings = ratings[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_codes[1:] != sorted_codes[:-1])))
+        counts = np.diff(np.append(starts, len(codes)))
+        sums = np.add.reduceat(sorted_ratings, starts)
+        sums_sq = np.add.reduceat(sorted_ratings * sorted_ratings, starts)
+        groups = np.split(sorted_ratings, starts[1:])
+        
+        grouped = []
+        for k in np.argsort(order[starts], kind="stable"):
+            values = groups[k].astype(np.int64) if integral else groups[k]
+            grouped.append((int(sorted_codes[starts[k]]), {
+                "count": int(counts[k]),
+                "sum": float(sums[k]),
+                "sum_sq": float(sums_sq[k]),
+                "ratings": values.tolist()
+            }))
+        return grouped
+        
+    @staticmethod
+    def _subset_masks(columns: FeedbackColumns, slot_entries: np.ndarray, slot_platforms: np.ndarray,
+                      tone: Optional[str], platform: Optional[str],
+                      start: Optional[datetime], end: Optional[datetime]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Entry and platform-slot masks for a subset, or (None, None) for everything"""
+        if tone is None and platform is None and start is None and end is None:
+            return None, None
+            
+        entry_mask = np.ones(len(columns), dtype=bool)
+        slot_mask = np.ones(len(slot_entries), dtype=bool)
+        
+        if tone is not None:
+            entry_mask &= columns.tone_codes == columns.tone_code(tone)
+        if start is not None:
+            entry_mask &= columns.epochs >= FeedbackColumns.to_epoch(start)
+        if end is not None:
+            entry_mask &= columns.epochs <= FeedbackColumns.to_epoch(end)
+        if platform is not None:
+            slot_mask &= slot_platforms == columns.platform_code(platform)
+            rated_on = np.zeros(len(columns), dtype=bool)
+            rated_on[slot_entries[slot_mask]] = True
+            entry_mask &= rated_on
+            
+        slot_mask &= entry_mask[slot_entries]
+        return entry_mask, slot_mask
+        
+    @staticmethod
+    def _mean(integral: bool, total: float, count: int, values: List[float]):
+        """Mean matching statistics.mean (an int for exact integer means)"""
+        if not integral:
+            # Fractional ratings need the exact, correctly rounded mean
+            return statistics.mean(values)
+        if total % count == 0:
+            return int(total // count)
+        return total / count
+        
+    @staticmethod
+    def _stdev(integral: bool, total: float, total_sq: float, count: int, values: List[float]) -> float:
+        """Sample standard deviation matching statistics.stdev"""
+        if not integral:
+            return statistics.stdev(values)
+        # Integer ratings: exact variance from the group sums, rounded once
+        return _sqrt_of_frac(count * int(total_sq) - int(total) ** 2, count * (count - 1))
+        
+    def analyze_patterns(self, tone: Optional[str] = None, platform: Optional[str] = None,
+                         start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, any]:
+        """Analyze patterns in feedback data
+
+        tone, platform and the inclusive start/end timestamps restrict the
+        analysis to matching entries; with a platform, only that platform's
+        ratings count toward the platform and combo breakdowns. The
+        unfiltered analysis is served from the per-version cache.
+        """
+        if tone is None and platform is None and start is None and end is None:
+            return self.get_pattern_analysis()
+        return self._analyze_patterns(tone, platform, start, end)
+        
+    def get_pattern_analysis(self) -> Dict[str, any]:
+        """Unfiltered analysis for the current data version, recomputed only when stale
+
+        Concurrent callers of a stale version wait for a single computation.
+        The result is shared, so callers must not modify it.
+        """
+        cached = self._pattern_analysis
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        with self._analysis_lock:
+            cached = self._pattern_analysis
+            # Read the version before taking the view, as for the weight table
+            version = self.version
+            if cached is None or cached[0] != version:
+                cached = self._pattern_analysis = (version, self._analyze_patterns())
+            return cached[1]
+        
+    def _analyze_patterns(self, tone: Optional[str] = None, platform: Optional[str] = None,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, any]:
+        """Compute the analysis of analyze_patterns from the columns"""
+        # A consistent view while feedback keeps being recorded
+        columns = self.columns.view()
+        integral = columns.integral_ratings
+        
+        # Collect ratings by different dimensions: one slot per (entry, platform)
+        slot_entries = np.repeat(np.arange(len(columns)), np.diff(columns.platform_indptr))
+        slot_platforms = columns.platform_codes.astype(np.int64)
+        entry_mask, slot_mask = self._subset_masks(columns, slot_entries, slot_platforms, tone, platform, start, end)
+        
+        ratings = columns.ratings
+        tone_codes = columns.tone_codes
+        slot_ratings = ratings[slot_entries]
+        slot_combos = tone_codes[slot_entries].astype(np.int64) * max(len(columns.platforms), 1) + slot_platforms
+        if entry_mask is not None:
+            ratings, tone_codes = ratings[entry_mask], tone_codes[entry_mask]
+            slot_ratings, slot_platforms, slot_combos = (
+                slot_ratings[slot_mask], slot_platforms[slot_mask], slot_combos[slot_mask]
+            )
+            
+        if not len(ratings):
             return {"error": "No feedback data available"}
             
         analysis = {
-            "total_feedback": len(self.feedback_data),
+            "total_feedback": len(ratings),
             "average_rating": 0,
-            "tone_performance": defaultdict(list),
-            "platform_performance": defaultdict(list),
-            "tone_platform_combo": defaultdict(list),
+            "tone_performance": {},
+            "platform_performance": {},
+            "tone_platform_combo": {},
             "low_performing_patterns": [],
             "high_performing_patterns": [],
             "recommendations": []
         }
         
-        # Collect ratings by different dimensions
-        all_ratings = []
+        tone_groups = self._group(tone_codes, ratings, integral)
+        platform_groups = self._group(slot_platforms, slot_ratings, integral)
+        combo_groups = self._group(slot_combos, slot_ratings, integral)
         
-        for entry in self.feedback_data:
-            rating = entry.get("rating", 0)
-            tone = entry.get("tone", "unknown")
-            platforms = entry.get("platforms", [])
-            
-            all_ratings.append(rating)
-            analysis["tone_performance"][tone].append(rating)
-            
-            for platform in platforms:
-                analysis["platform_performance"][platform].append(rating)
-                combo_key = f"{tone}_{platform}"
-                analysis["tone_platform_combo"][combo_key].append(rating)
-                
         # Calculate averages
-        analysis["average_rating"] = statistics.mean(all_ratings) if all_ratings else 0
+        analysis["average_rating"] = self._mean(integral, float(ratings.sum()), len(ratings), ratings.tolist())
         
         # Analyze tone performance
         tone_stats = {}
-        for tone, ratings in analysis["tone_performance"].items():
-            if ratings:
-                avg = statistics.mean(ratings)
-                tone_stats[tone] = {
-                    "average": avg,
-                    "count": len(ratings),
-                    "std_dev": statistics.stdev(ratings) if len(ratings) > 1 else 0
-                }
+        for code, group in tone_groups:
+            tone = columns.tones[code]
+            analysis["tone_performance"][tone] = group["ratings"]
+            tone_stats[tone] = {
+                "average": self._mean(integral, group["sum"], group["count"], group["ratings"]),
+                "count": group["count"],
+                "std_dev": self._stdev(integral, group["sum"], group["sum_sq"], group["count"], group["ratings"]) if group["count"] > 1 else 0
+            }
                 
         analysis["tone_stats"] = tone_stats
         
         # Analyze platform performance
         platform_stats = {}
-        for platform, ratings in analysis["platform_performance"].items():
-            if ratings:
-                avg = statistics.mean(ratings)
-                platform_stats[platform] = {
-                    "average": avg,
-                    "count": len(ratings),
-                    "std_dev": statistics.stdev(ratings) if len(ratings) > 1 else 0
-                }
+        for code, group in platform_groups:
+            platform = columns.platforms[code]
+            analysis["platform_performance"][platform] = group["ratings"]
+            platform_stats[platform] = {
+                "average": self._mean(integral, group["sum"], group["count"], group["ratings"]),
+                "count": group["count"],
+                "std_dev": self._stdev(integral, group["sum"], group["sum_sq"], group["count"], group["ratings"]) if group["count"] > 1 else 0
+            }
                 
         analysis["platform_stats"] = platform_stats
         
         # Find patterns
         combo_stats = {}
-        for combo, ratings in analysis["tone_platform_combo"].items():
-            if ratings:
-                avg = statistics.mean(ratings)
-                combo_stats[combo] = {
-                    "average": avg,
-                    "count": len(ratings),
-                    "ratings": ratings
-                }
-                
-                # Identify low and high performers
-                if avg < 2.5 and len(ratings) >= 2:
-                    analysis["low_performing_patterns"].append({
-                        "pattern": combo,
-                        "average_rating": avg,
-                        "sample_size": len(ratings)
-                    })
-                elif avg >= 4.0 and len(ratings) >= 2:
-                    analysis["high_performing_patterns"].append({
-                        "pattern": combo,
-                        "average_rating": avg,
-                        "sample_size": len(ratings)
-                    })
+        for code, group in combo_groups:
+            tone_code, platform_code = divmod(code, max(len(columns.platforms), 1))
+            combo = f"{columns.tones[tone_code]}_{columns.platforms[platform_code]}"
+            analysis["tone_platform_combo"][combo] = group["ratings"]
+            avg = self._mean(integral, group["sum"], group["count"], group["ratings"])
+            count = group["count"]
+            combo_stats[combo] = {
+                "average": avg,
+                "count": count,
+                "ratings": group["ratings"]
+            }
+            
+            # Identify low and high performers
+            if avg < 2.5 and count >= 2:
+                analysis["low_performing_patterns"].append({
+                    "pattern": combo,
+                    "average_rating": avg,
+                    "sample_size": count
+                })
+            elif avg >= 4.0 and count >= 2:
+                analysis["high_performing_patterns"].append({
+                    "pattern": combo,
+                    "average_rating": avg,
+                    "sample_size": count
+                })
                     
         analysis["combo_stats"] = combo_stats
         
@@ -163,50 +421,58 @@ class FeedbackAnalyzer:
             
         return recommendations
         
+    def get_weight_table(self) -> WeightTable:
+        """Adaptive weight table for the current data version, recomputed only when stale"""
+        table = self._weight_table
+        # Read the version before taking the view: a table is never labelled newer than its data
+        version = self.version
+        if not self.adaptive_weights.is_fresh(table, version):
+            table = self._weight_table = self.adaptive_weights.compute(self.columns.view(), version)
+        return table
+        
     def get_adaptive_weights(self) -> Dict[str, float]:
         """Generate adaptive weights for prompt building based on feedback"""
-        analysis = self.analyze_patterns()
-        weights = {}
-        
-        # Base weights
-        default_weight = 1.0
-        
-        # Adjust weights based on performance
-        for combo, stats in analysis.get("combo_stats", {}).items():
-            if stats["count"] >= 2:  # Only adjust if we have enough data
-                performance_ratio = stats["average"] / 5.0  # Normalize to 0-1
-                weights[combo] = 0.5 + (performance_ratio * 0.5)  # Scale between 0.5-1.0
-            else:
-                weights[combo] = default_weight
-                
-        return weights
+        return self.get_weight_table().weights
         
-    def get_time_based_trends(self) -> Dict[str, any]:
-        """Analyze trends over time"""
-        if not self.feedback_data:
+    def get_time_based_trends(self, granularity: str = "day", start: Optional[datetime] = None,
+                              end: Optional[datetime] = None, tone: Optional[str] = None,
+                              platform: Optional[str] = None) -> Dict[str, any]:
+        """Analyze trends over time from the pre-aggregated rollups
+
+        start and end are exact, inclusive timestamps, as in analyze_patterns.
+        The rollups hold whole buckets, so a bucket that a bound falls inside
+        is recounted from the columns with only the entries within bounds.
+        """
+        if not len(self.columns):
             return {"error": "No feedback data available"}
             
-        # Sort by timestamp
-        sorted_feedback = sorted(
-            self.feedback_data,
-            key=lambda x: datetime.fromisoformat(x.get("timestamp", "2024-01-01"))
-        )
-        
-        # Group by day
-        daily_ratings = defaultdict(list)
-        for entry in sorted_feedback:
-            timestamp = datetime.fromisoformat(entry.get("timestamp", "2024-01-01"))
-            day = timestamp.date().isoformat()
-            daily_ratings[day].append(entry.get("rating", 0))
-            
-        # Calculate daily averages
-        trends = {}
-        for day, ratings in daily_ratings.items():
-            trends[day] = {
-                "average_rating": statistics.mean(ratings),
-                "count": len(ratings)
-            }
+        trends = self.rollups.query(granularity, start=start, end=end, tone=tone, platform=platform)
+        # Buckets a bound cuts through; a start on a bucket boundary cuts nothing
+        cut = set()
+        if start is not None:
+            bucket = FeedbackRollups.bucket_id(start, granularity)
+            if FeedbackRollups.bucket_bounds(bucket, granularity)[0] != start:
+                cut.add(bucket)
+        if end is not None:
+            cut.add(FeedbackRollups.bucket_id(end, granularity))
+        cut = [bucket for bucket in cut if FeedbackRollups.bucket_label(bucket, granularity) in trends]
+        if not cut:
+            return trends
             
+        columns = self.columns.view()
+        slot_entries = np.repeat(np.arange(len(columns)), np.diff(columns.platform_indptr))
+        entry_mask, _ = self._subset_masks(columns, slot_entries, columns.platform_codes.astype(np.int64),
+                                           tone, platform, start, end)
+        for bucket in cut:
+            bucket_start, bucket_end = FeedbackRollups.bucket_bounds(bucket, granularity)
+            in_bucket = (entry_mask & (columns.epochs >= FeedbackColumns.to_epoch(bucket_start))
+                         & (columns.epochs < FeedbackColumns.to_epoch(bucket_end)))
+            count = int(in_bucket.sum())
+            label = FeedbackRollups.bucket_label(bucket, granularity)
+            if count:
+                trends[label] = {"average_rating": float(columns.ratings[in_bucket].sum()) / count, "count": count}
+            else:
+                del trends[label]
         return trends
         
     def export_insights(self, output_file: str = "feedback_insights.json"):
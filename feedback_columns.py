@@ -0,0 +1,354 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import numpy as np
+import threading
+import json
+
+_EPOCH = datetime(1970, 1, 1)
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+class FeedbackColumns:
+    """Compact columnar store for feedback entries
+
+    Only the fields the analyses need are held in memory: rating and epoch
+    time as NumPy arrays, tone as interned integer codes and the platform
+    lists in a CSR layout (platform_indptr/platform_codes). The large text
+    fields stay on disk; each entry keeps the byte span of its JSON object
+    in the feedback file so the text can be loaded on demand.
+
+    One thread appends while others read: readers take a view(), a
+    read-only store over the entries appended so far that stays consistent
+    however many entries are appended after it was taken.
+    """
+
+    TEXT_FIELDS = ("ad_text", "rewritten_output")
+
+    def __init__(self, feedback_file: str = "feedback_store.json", capacity: int = 1024):
+        self.feedback_file = feedback_file
+        self.size = 0
+        # True while every rating is a Python int, so results keep int types
+        self.integral_ratings = True
+
+        self._ratings = np.zeros(capacity, dtype=np.float64)
+        self._epochs = np.zeros(capacity, dtype=np.float64)
+        self._tone_codes = np.zeros(capacity, dtype=np.int32)
+        self._spans = np.full((capacity, 2), -1, dtype=np.int64)
+        self._platform_indptr = np.zeros(capacity + 1, dtype=np.int64)
+        self._platform_codes = np.zeros(capacity, dtype=np.int32)
+
+        # Interned vocabularies, in first-seen order
+        self.tones: List[str] = []
+        self.platforms: List[str] = []
+        self._tone_index: Dict[str, int] = {}
+        self._platform_index: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def ratings(self) -> np.ndarray:
+        return self._ratings[:self.size]
+
+    @property
+    def epochs(self) -> np.ndarray:
+        return self._epochs[:self.size]
+
+    @property
+    def tone_codes(self) -> np.ndarray:
+        return self._tone_codes[:self.size]
+
+    @property
+    def platform_indptr(self) -> np.ndarray:
+        return self._platform_indptr[:self.size + 1]
+
+    @property
+    def platform_codes(self) -> np.ndarray:
+        return self._platform_codes[:self._platform_indptr[self.size]]
+
+    @staticmethod
+    def to_epoch(timestamp: datetime) -> float:
+        """Seconds since 1970-01-01 on the timestamp's wall clock"""
+        return (timestamp.replace(tzinfo=None) - _EPOCH).total_seconds()
+
+    def tone_code(self, tone: str) -> int:
+        """Interned code for a tone, or -1 if it has never been seen"""
+        return self._tone_index.get(tone, -1)
+
+    def platform_code(self, platform: str) -> int:
+        """Interned code for a platform, or -1 if it has never been seen"""
+        return self._platform_index.get(platform, -1)
+
+    def append(self, timestamp: datetime, tone: str, platforms: List[str], rating: float,
+               span: Optional[Tuple[int, int]] = None):
+        """Append one entry; span is its byte range in the feedback file, if known"""
+        epoch = self.to_epoch(timestamp)
+        with self._lock:
+            self._reserve(self.size + 1, int(self._platform_indptr[self.size]) + len(platforms))
+            i = self.size
+
+            # Only slots past the current size are written, so views stay valid
+            self._ratings[i] = rating
+            self._epochs[i] = epoch
+            self._tone_codes[i] = self._intern(tone, self.tones, self._tone_index)
+            self._spans[i] = span if span is not None else (-1, -1)
+            if self.integral_ratings and not isinstance(rating, int):
+                self.integral_ratings = False
+
+            start = self._platform_indptr[i]
+            for offset, platform in enumerate(platforms):
+                self._platform_codes[start + offset] = self._intern(platform, self.platforms, self._platform_index)
+            self._platform_indptr[i + 1] = start + len(platforms)
+
+            self.size += 1
+
+    def view(self) -> "FeedbackColumns":
+        """Read-only store over the entries appended so far
+
+        The view shares this store's arrays instead of copying them: append
+        only writes past the current size, and growing the arrays replaces
+        them with copies, so the view's data never changes under it.
+        """
+        with self._lock:
+            arrays, meta = self.to_arrays()
+        for array in arrays.values():
+            array.flags.writeable = False
+        return FeedbackColumns.from_arrays(self.feedback_file, arrays, meta)
+
+    def entry_platforms(self, i: int) -> List[str]:
+        """Platform names of entry i"""
+        start, end = self._platform_indptr[i], self._platform_indptr[i + 1]
+        return [self.platforms[code] for code in self._platform_codes[start:end]]
+
+    def entry_datetime(self, i: int) -> datetime:
+        """Wall-clock timestamp of entry i"""
+        return _EPOCH + timedelta(seconds=float(self._epochs[i]))
+
+    def get_text(self, i: int, field: str) -> str:
+        """Load a text field of entry i lazily from the feedback file"""
+        if field not in self.TEXT_FIELDS:
+            raise KeyError(field)
+        entry = self._read_entry(i)
+        if entry is None:
+            # The file was rewritten or the entry was appended after load
+            self.reindex()
+            entry = self._read_entry(i)
+        return entry.get(field, "") if entry is not None else ""
+
+    def load_range(self, start: int, end: int) -> List[Dict]:
+        """Load entries start to end (exclusive), text fields included, with one read of the file
+
+        Lets callers work through the store in chunks instead of loading
+        every entry. Entries no longer found in the file are rebuilt from
+        the columns, without their text fields.
+        """
+        end = min(end, self.size)
+        if start >= end:
+            return []
+        entries = self._read_range(start, end)
+        if any(entry is None for entry in entries):
+            # The file was rewritten or entries were appended after load
+            self.reindex()
+            entries = self._read_range(start, end)
+        return [
+            entry if entry is not None else self._columnar_entry(start + k)
+            for k, entry in enumerate(entries)
+        ]
+
+    def load_entries(self) -> List[Dict]:
+        """Load every stored entry, text fields included, in one pass over the file"""
+        entries = []
+        for entry, _ in self.scan(self.feedback_file):
+            if len(entries) >= self.size:
+                break
+            entries.append(entry)
+        return entries
+
+    def tail_offset(self) -> Optional[int]:
+        """Byte offset just past the last entry, if that entry is still in place in the file
+
+        None when the store is empty, the last entry's span is unknown, or the
+        file was rewritten since; scanning from the offset then is unsafe.
+        """
+        with self._lock:
+            if not self.size or self._read_entry(self.size - 1) is None:
+                return None
+            return int(self._spans[self.size - 1][1])
+
+    def reindex(self):
+        """Rebuild the byte spans of every entry from the feedback file"""
+        with self._lock:
+            if not self._spans.flags.writeable:
+                # Spans of a view or mapped from a read-only snapshot
+                self._spans = self._spans.copy()
+            for i, (_, span) in enumerate(self.scan(self.feedback_file)):
+                if i >= self.size:
+                    break
+                self._spans[i] = span
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, any]]:
+        """Trimmed column arrays plus the metadata needed to rebuild the store"""
+        with self._lock:
+            arrays = {
+                "ratings": self.ratings,
+                "epochs": self.epochs,
+                "tone_codes": self.tone_codes,
+                "spans": self._spans[:self.size],
+                "platform_indptr": self.platform_indptr,
+                "platform_codes": self.platform_codes
+            }
+            meta = {
+                "tones": list(self.tones),
+                "platforms": list(self.platforms),
+                "integral_ratings": self.integral_ratings
+            }
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, feedback_file: str, arrays: Dict[str, np.ndarray],
+                    meta: Dict[str, any]) -> "FeedbackColumns":
+        """Store backed directly by the given arrays, e.g. read-only memory maps
+
+        No data is copied, so the result must not be appended to.
+        """
+        columns = cls(feedback_file, capacity=0)
+        columns.size = len(arrays["ratings"])
+        columns.integral_ratings = meta["integral_ratings"]
+        columns._ratings = arrays["ratings"]
+        columns._epochs = arrays["epochs"]
+        columns._tone_codes = arrays["tone_codes"]
+        columns._spans = arrays["spans"]
+        columns._platform_indptr = arrays["platform_indptr"]
+        columns._platform_codes = arrays["platform_codes"]
+        for tone in meta["tones"]:
+            cls._intern(tone, columns.tones, columns._tone_index)
+        for platform in meta["platforms"]:
+            cls._intern(platform, columns.platforms, columns._platform_index)
+        return columns
+
+    def _read_entry(self, i: int) -> Optional[Dict]:
+        start, end = self._spans[i]
+        if start < 0:
+            return None
+        try:
+            with open(self.feedback_file, 'rb') as f:
+                f.seek(start)
+                raw = f.read(end - start)
+        except OSError:
+            return None
+        return self._checked_entry(i, raw)
+
+    def _read_range(self, start: int, end: int) -> List[Optional[Dict]]:
+        """Entries start to end from one read covering all their spans; None where stale"""
+        spans = self._spans[start:end].tolist()
+        known = [span for span in spans if span[0] >= 0]
+        if not known:
+            return [None] * len(spans)
+        low, high = min(s for s, _ in known), max(e for _, e in known)
+        try:
+            with open(self.feedback_file, 'rb') as f:
+                f.seek(low)
+                raw = f.read(high - low)
+        except OSError:
+            return [None] * len(spans)
+        return [
+            self._checked_entry(start + k, raw[s - low:e - low]) if s >= 0 else None
+            for k, (s, e) in enumerate(spans)
+        ]
+
+    def _checked_entry(self, i: int, raw: bytes) -> Optional[Dict]:
+        """Parse entry i's bytes; None unless they still hold entry i"""
+        try:
+            entry = json.loads(raw)
+            # Guard against a stale span pointing at a different entry
+            if not isinstance(entry, dict):
+                return None
+            timestamp = datetime.fromisoformat(entry.get("timestamp", "2024-01-01"))
+        except ValueError:
+            return None
+        return entry if self.to_epoch(timestamp) == self._epochs[i] else None
+
+    def _columnar_entry(self, i: int) -> Dict:
+        """Entry i's analysis fields as held in the columns"""
+        rating = float(self._ratings[i])
+        return {
+            "timestamp": self.entry_datetime(i).isoformat(),
+            "tone": self.tones[self._tone_codes[i]],
+            "platforms": self.entry_platforms(i),
+            "rating": int(rating) if self.integral_ratings else rating
+        }
+
+    @staticmethod
+    def scan(feedback_file: str, offset: int = 0) -> Iterator[Tuple[Dict, Tuple[int, int]]]:
+        """Yield (entry, byte span) for each object in a JSON array file
+
+        With an offset, scanning resumes right after an entry ending there
+        and only the rest of the file is read.
+        """
+        try:
+            with open(feedback_file, 'rb') as f:
+                f.seek(offset)
+                raw = f.read()
+        except FileNotFoundError:
+            return
+
+        text = raw.decode("utf-8")
+        ascii_only = len(text) == len(raw)
+        pos = _skip(text, 0)
+        if offset == 0:
+            if pos >= len(text) or text[pos] != "[":
+                raise json.JSONDecodeError("Expected a JSON array", text, pos)
+            pos = _skip(text, pos + 1)
+        elif pos < len(text) and text[pos] == ",":
+            pos = _skip(text, pos + 1)
+
+        byte_pos, char_pos = offset, 0
+        while pos < len(text) and text[pos] != "]":
+            entry, end = _DECODER.raw_decode(text, pos)
+            if ascii_only:
+                span = (offset + pos, offset + end)
+            else:
+                # Translate character offsets to byte offsets incrementally
+                byte_pos += len(text[char_pos:pos].encode("utf-8"))
+                start = byte_pos
+                byte_pos += len(text[pos:end].encode("utf-8"))
+                char_pos = end
+                span = (start, byte_pos)
+            yield entry, span
+
+            pos = _skip(text, end)
+            if pos < len(text) and text[pos] == ",":
+                pos = _skip(text, pos + 1)
+
+    def _reserve(self, entries: int, platform_slots: int):
+        """Grow the arrays geometrically to fit the given sizes"""
+        if entries > len(self._ratings):
+            capacity = max(entries, 2 * len(self._ratings))
+            self._ratings = _resize(self._ratings, capacity)
+            self._epochs = _resize(self._epochs, capacity)
+            self._tone_codes = _resize(self._tone_codes, capacity)
+            self._spans = _resize(self._spans, capacity, fill=-1)
+            self._platform_indptr = _resize(self._platform_indptr, capacity + 1)
+        if platform_slots > len(self._platform_codes):
+            self._platform_codes = _resize(self._platform_codes, max(platform_slots, 2 * len(self._platform_codes)))
+
+    @staticmethod
+    def _intern(value: str, vocab: List[str], index: Dict[str, int]) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(vocab)
+            vocab.append(value)
+        return code
+
+
+def _skip(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _resize(array: np.ndarray, length: int, fill: int = 0) -> np.ndarray:
+    grown = np.full((length,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
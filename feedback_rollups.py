@@ -0,0 +1,226 @@
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import date, datetime, timedelta
+import numpy as np
+import threading
+
+GRANULARITIES = ("hour", "day", "week")
+
+# Table keys are bucket id << _CELL_BITS | cell code, so they sort by bucket first
+_CELL_BITS = 32
+_CELL_MASK = (1 << _CELL_BITS) - 1
+
+# Queued entries merged into the tables at once, at most
+_MAX_PENDING = 4096
+
+class FeedbackRollups:
+    """Pre-aggregated rating sums and counts per time bucket
+
+    Buckets are kept at hour, day and week granularity and updated as each
+    feedback entry arrives, so trend queries cost O(buckets) instead of
+    re-reading every entry. Each bucket holds one cell per tone for the
+    entry-level totals and one per (tone, platform) pair.
+
+    Each granularity is a table of sorted keys (bucket, cell) with their
+    rating sums and counts. Tables are never changed in place: add() queues
+    the entry, and the next read merges the queue into new tables that
+    replace the old ones in a single assignment. Readers use whichever
+    tables they picked up, so they never see a half-applied update and need
+    no lock, and tables mapped from a snapshot can be used as they are.
+    """
+
+    def __init__(self):
+        # Interned vocabularies, in first-seen order
+        self.tones: List[str] = []
+        self.platforms: List[str] = []
+        self._tone_index: Dict[str, int] = {}
+        self._platform_index: Dict[str, int] = {}
+        # Cell code -> (tone code, platform code or -1 for the entry-level cell)
+        self._cells: List[Tuple[int, int]] = []
+        self._cell_index: Dict[Tuple[int, int], int] = {}
+
+        tables = {
+            g: (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int64))
+            for g in GRANULARITIES
+        }
+        # (tables, cell tone codes, cell platform codes), replaced as a whole
+        self._state = (tables, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+        self._pending: List[Tuple[Tuple[int, ...], List[int], float]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket_id(timestamp: Union[datetime, date], granularity: str) -> int:
+        """Integer id of the bucket containing timestamp"""
+        day = timestamp.toordinal()
+        if granularity == "hour":
+            hour = timestamp.hour if isinstance(timestamp, datetime) else 0
+            return day * 24 + hour
+        if granularity == "day":
+            return day
+        if granularity == "week":
+            # Weeks start on Monday
+            return day - timestamp.weekday()
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+
+    @staticmethod
+    def bucket_bounds(bucket: int, granularity: str) -> Tuple[datetime, datetime]:
+        """Start (inclusive) and end (exclusive) of a bucket"""
+        if granularity == "hour":
+            day, hour = divmod(bucket, 24)
+            start = datetime.fromordinal(day).replace(hour=hour)
+            return start, start + timedelta(hours=1)
+        start = datetime.fromordinal(bucket)
+        return start, start + timedelta(days=7 if granularity == "week" else 1)
+
+    @staticmethod
+    def bucket_label(bucket: int, granularity: str) -> str:
+        """ISO label for a bucket id"""
+        if granularity == "hour":
+            day, hour = divmod(bucket, 24)
+            return datetime.fromordinal(day).replace(hour=hour).isoformat(timespec="minutes")
+        return date.fromordinal(bucket).isoformat()
+
+    def add(self, timestamp: datetime, tone: str, platforms: List[str], rating: float):
+        """Fold one feedback entry into every granularity"""
+        buckets = tuple(self.bucket_id(timestamp, g) for g in GRANULARITIES)
+
+        with self._lock:
+            tone_code = self._intern(tone, self.tones, self._tone_index)
+            cells = [self._cell(tone_code, -1)] + [
+                self._cell(tone_code, self._intern(platform, self.platforms, self._platform_index))
+                for platform in platforms
+            ]
+            self._pending.append((buckets, cells, rating))
+            if len(self._pending) >= _MAX_PENDING:
+                self._merge()
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """The current tables and cell codes as arrays, with the tone and platform names"""
+        tables, cell_tone, cell_platform = self._current()
+        arrays = {"cell_tone": cell_tone, "cell_platform": cell_platform}
+        for granularity in GRANULARITIES:
+            keys, sums, counts = tables[granularity]
+            arrays[f"{granularity}_key"] = keys
+            arrays[f"{granularity}_sum"] = sums
+            arrays[f"{granularity}_count"] = counts
+        return arrays, {"tones": list(self.tones), "platforms": list(self.platforms)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, List[str]]) -> "FeedbackRollups":
+        """Rollups backed directly by arrays from to_arrays, e.g. read-only memory maps
+
+        No table data is copied; entries added later go into new tables.
+        """
+        rollups = cls()
+        for tone in meta["tones"]:
+            cls._intern(tone, rollups.tones, rollups._tone_index)
+        for platform in meta["platforms"]:
+            cls._intern(platform, rollups.platforms, rollups._platform_index)
+        for cell in zip(arrays["cell_tone"].tolist(), arrays["cell_platform"].tolist()):
+            rollups._cell_index[cell] = len(rollups._cells)
+            rollups._cells.append(cell)
+
+        tables = {
+            g: (arrays[f"{g}_key"], arrays[f"{g}_sum"], arrays[f"{g}_count"])
+            for g in GRANULARITIES
+        }
+        rollups._state = (tables, arrays["cell_tone"], arrays["cell_platform"])
+        return rollups
+
+    def query(self, granularity: str = "day",
+              start: Optional[Union[datetime, date]] = None,
+              end: Optional[Union[datetime, date]] = None,
+              tone: Optional[str] = None,
+              platform: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Average rating and count per bucket, oldest first
+
+        start and end are inclusive and bucket-aligned: every bucket that
+        overlaps the range is returned whole. Without a platform the counts
+        are per feedback entry; with one they cover entries rated on it.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+
+        tables, cell_tone, cell_platform = self._current()
+        keys, sums, counts = tables[granularity]
+        lo = np.searchsorted(keys, self.bucket_id(start, granularity) << _CELL_BITS) if start is not None else 0
+        hi = np.searchsorted(keys, (self.bucket_id(end, granularity) + 1) << _CELL_BITS) if end is not None else len(keys)
+        keys, sums, counts = keys[lo:hi], sums[lo:hi], counts[lo:hi]
+
+        # Cells matching tone and platform; unknown names match nothing
+        cells = keys & _CELL_MASK
+        mask = cell_platform[cells] == (-1 if platform is None else self._platform_index.get(platform, -2))
+        if tone is not None:
+            mask &= cell_tone[cells] == self._tone_index.get(tone, -2)
+
+        buckets = keys[mask] >> _CELL_BITS
+        if not len(buckets):
+            return {}
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        bucket_sums = np.add.reduceat(sums[mask], starts)
+        bucket_counts = np.add.reduceat(counts[mask], starts)
+
+        trends = {}
+        for bucket, rating_sum, count in zip(buckets[starts].tolist(), bucket_sums.tolist(), bucket_counts.tolist()):
+            if count:
+                trends[self.bucket_label(bucket, granularity)] = {
+                    "average_rating": rating_sum / count,
+                    "count": count
+                }
+
+        return trends
+
+    def _current(self) -> Tuple[Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]], np.ndarray, np.ndarray]:
+        """Tables with every queued entry merged in"""
+        if self._pending:
+            with self._lock:
+                if self._pending:
+                    self._merge()
+        return self._state
+
+    def _merge(self):
+        """Merge queued entries into new tables; caller holds the lock"""
+        pending, self._pending = self._pending, []
+        tables = self._state[0]
+
+        per_entry = np.fromiter((len(cells) for _, cells, _ in pending), dtype=np.int64, count=len(pending))
+        cells = np.fromiter((c for _, entry_cells, _ in pending for c in entry_cells), dtype=np.int64,
+                            count=int(per_entry.sum()))
+        ratings = np.repeat(np.array([rating for _, _, rating in pending], dtype=np.float64), per_entry)
+
+        merged = {}
+        for i, granularity in enumerate(GRANULARITIES):
+            buckets = np.repeat(np.fromiter((b[i] for b, _, _ in pending), dtype=np.int64, count=len(pending)), per_entry)
+            new_keys = buckets << _CELL_BITS | cells
+            old_keys, old_sums, old_counts = tables[granularity]
+
+            keys = np.union1d(old_keys, new_keys)
+            sums = np.zeros(len(keys), dtype=np.float64)
+            counts = np.zeros(len(keys), dtype=np.int64)
+            at = np.searchsorted(keys, old_keys)
+            sums[at] = old_sums
+            counts[at] = old_counts
+            # add.at applies the entries one by one, in arrival order
+            at = np.searchsorted(keys, new_keys)
+            np.add.at(sums, at, ratings)
+            np.add.at(counts, at, 1)
+            merged[granularity] = (keys, sums, counts)
+
+        cell_tone = np.array([tone for tone, _ in self._cells], dtype=np.int32)
+        cell_platform = np.array([platform for _, platform in self._cells], dtype=np.int32)
+        self._state = (merged, cell_tone, cell_platform)
+
+    def _cell(self, tone_code: int, platform_code: int) -> int:
+        cell = (tone_code, platform_code)
+        code = self._cell_index.get(cell)
+        if code is None:
+            code = self._cell_index[cell] = len(self._cells)
+            self._cells.append(cell)
+        return code
+
+    @staticmethod
+    def _intern(value: str, vocab: List[str], index: Dict[str, int]) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(vocab)
+            vocab.append(value)
+        return code
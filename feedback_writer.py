@@ -0,0 +1,191 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future
+import threading
+import logging
+import queue
+import json
+import time
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process lock, so only one process may write the store
+    fcntl = None
+
+DURABILITY_MODES = ("enqueue", "commit")
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class FeedbackWriter:
+    """Group-commit feedback entries to the store from a background thread
+
+    Entries are queued by the request threads and appended to the JSON store
+    in micro-batches of at most max_batch entries, waiting at most
+    max_wait_ms after the first entry of a batch for more to arrive. Each
+    batch costs one append and one fsync. The batch's submitters are released
+    as soon as it is on disk; then it is passed to on_commit with the byte
+    span of every entry, and errors from on_commit are logged.
+
+    Durability modes:
+    - "commit": submit() returns once the entry is on disk
+    - "enqueue": submit() returns once the entry is queued; entries still
+      queued when the process dies are lost
+    """
+
+    def __init__(self, feedback_file: str,
+                 on_commit: Callable[[List[Tuple[Dict, Tuple[int, int]]]], None],
+                 durability: str = "commit", max_batch: int = 100, max_wait_ms: float = 10):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability '{durability}', expected one of {DURABILITY_MODES}")
+        self.feedback_file = feedback_file
+        self.on_commit = on_commit
+        self.durability = durability
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+        self.stats = {"batches": 0, "entries": 0, "errors": 0, "last_error": None}
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry: Dict, timeout: Optional[float] = None) -> Future:
+        """Queue an entry; in commit mode, block until it has been written"""
+        if self._closed:
+            raise RuntimeError("Feedback writer is closed")
+        future = Future()
+        self._queue.put((entry, future))
+        if self.durability == "commit":
+            # Re-raises the write error, if any
+            future.result(timeout)
+        return future
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop accepting entries, flush everything queued and stop the thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+
+            # Gather more entries until the batch is full or the wait is over
+            deadline = time.monotonic() + self.max_wait_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+
+        # Flush whatever arrived before close() and its stop marker
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.max_batch):
+            self._commit(leftover[start:start + self.max_batch])
+
+    def _commit(self, batch: List[Tuple[Dict, Future]]):
+        entries = [entry for entry, _ in batch]
+        try:
+            spans = self._append(entries)
+            self.stats["batches"] += 1
+            self.stats["entries"] += len(entries)
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(e)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        # The entries are durable now: release the waiting requests before folding them in
+        for _, future in batch:
+            future.set_result(None)
+
+        try:
+            self.on_commit(list(zip(entries, spans)))
+        except Exception as e:
+            # The entries are on disk; the aggregates catch up on the next reload
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(e)
+            logger.exception("Folding %d committed feedback entries in failed", len(entries))
+
+    def _append(self, entries: List[Dict]) -> List[Tuple[int, int]]:
+        """Append entries to the JSON array in place; returns their byte spans
+
+        The output matches json.dump(data, f, indent=2) of the whole list,
+        without rewriting the entries already in the file.
+        """
+        blocks = [
+            "  " + json.dumps(entry, indent=2).replace("\n", "\n  ")
+            for entry in entries
+        ]
+
+        with open(self.feedback_file, "a+b") as f:
+            # Other workers may be appending or reading the store too
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            end = f.seek(0, os.SEEK_END)
+            close, empty = self._find_array_end(f, end)
+
+            if close is None:
+                # Missing or empty file: start a new array
+                f.truncate(0)
+                pos, prefix = 0, "[\n"
+            else:
+                pos, prefix = close, "\n" if empty else ",\n"
+
+            spans = []
+            chunks = []
+            offset = pos
+            for i, block in enumerate(blocks):
+                lead = (prefix if i == 0 else ",\n").encode("utf-8")
+                body = block.encode("utf-8")
+                spans.append((offset + len(lead) + 2, offset + len(lead) + len(body)))
+                chunks.append(lead + body)
+                offset += len(lead) + len(body)
+
+            f.truncate(pos)
+            f.write(b"".join(chunks) + b"\n]")
+            f.flush()
+            os.fsync(f.fileno())
+        return spans
+
+    @staticmethod
+    def _find_array_end(f, end: int) -> Tuple[Optional[int], bool]:
+        """Offset where new entries go (after the last entry) and whether the array is empty"""
+        if end == 0:
+            return None, True
+        tail_size = min(end, 4096)
+        f.seek(end - tail_size)
+        tail = f.read(tail_size)
+
+        close = tail.rstrip().rfind(b"]")
+        if close < 0:
+            raise ValueError("Feedback store is not a JSON array")
+        before = tail[:close].rstrip()
+        empty = before.endswith(b"[")
+        # New entries go right after the last entry (or the opening bracket)
+        return end - tail_size + len(before), empty
@@ -0,0 +1,280 @@
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import threading
+import sqlite3
+import uuid
+import json
+import time
+import os
+
+# A job kind turns the job's params into (number of units, function that runs
+# unit i and returns its result records). Units must be deterministic so a
+# resumed job can skip the ones already stored.
+JobPlan = Callable[[Dict], Tuple[int, Callable[[int], List[Dict]]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    error TEXT,
+    owner TEXT,
+    heartbeat REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    unit INTEGER NOT NULL,
+    lines TEXT NOT NULL,
+    PRIMARY KEY (job_id, unit)
+);
+"""
+
+
+class JobStore:
+    """SQLite-backed job queue; safe to share between threads and processes
+
+    Each finished unit's records are stored as NDJSON lines in the same
+    transaction that advances the job's progress, so a job resumed after a
+    crash or restart continues from the first unit without results.
+
+    A job whose worker died max_attempts times (its lease ran out without
+    the job finishing) is moved to the 'dead' status instead of being
+    claimed again, so one poisonous job cannot keep taking workers down.
+    """
+
+    def __init__(self, path: str = "jobs.db", lease_s: float = 120.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def submit(self, kind: str, params: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params), time.time())
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def claim(self, owner: str) -> Optional[Dict[str, any]]:
+        """Take the oldest queued job, or a running one whose owner stopped heartbeating"""
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so other processes can't claim the same job
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT id, status, attempts FROM jobs "
+                        "WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+                        "ORDER BY created_at LIMIT 1",
+                        (now - self.lease_s,)
+                    ).fetchone()
+                    if row is None or row["status"] == "queued" or row["attempts"] < self.max_attempts:
+                        break
+                    # Dead-letter it: its workers died on every attempt
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'dead', error = ?, finished_at = ?, owner = NULL, heartbeat = NULL "
+                        "WHERE id = ?",
+                        (f"Worker lost on each of {row['attempts']} attempts", now, row["id"])
+                    )
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, attempts = attempts + 1, "
+                        "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                        (owner, now, now, row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def set_total(self, job_id: str, owner: str, total: int):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET total = ? WHERE id = ? AND owner = ?", (total, job_id, owner))
+
+    def store_unit(self, job_id: str, owner: str, unit: int, records: List[Dict]) -> bool:
+        """Save a unit's records and advance progress; False if the job was taken over"""
+        lines = "".join(json.dumps(record) + "\n" for record in records)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                updated = self._conn.execute(
+                    "UPDATE jobs SET done = ?, heartbeat = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                    (unit + 1, time.time(), job_id, owner)
+                ).rowcount
+                if updated:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO job_results (job_id, unit, lines) VALUES (?, ?, ?)",
+                        (job_id, unit, lines)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return bool(updated)
+
+    def finish(self, job_id: str, owner: str, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, heartbeat = NULL "
+                "WHERE id = ? AND owner = ?",
+                ("failed" if error else "succeeded", error, time.time(), job_id, owner)
+            )
+
+    def heartbeat(self, owner: str):
+        """Extend the lease on every job this owner is running"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'", (time.time(), owner)
+            )
+
+    def release(self, owner: str):
+        """Requeue this owner's running jobs so they resume right away on the next start
+
+        An orderly stop does not count as a failed attempt.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, heartbeat = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE owner = ? AND status = 'running'",
+                (owner,)
+            )
+
+    def results(self, job_id: str, batch: int = 64) -> Iterator[str]:
+        """Stored NDJSON result lines, unit by unit"""
+        last = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT unit, lines FROM job_results WHERE job_id = ? AND unit > ? ORDER BY unit LIMIT ?",
+                    (job_id, last, batch)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row["lines"]
+            last = rows[-1]["unit"]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobRunner:
+    """Local worker pool that runs jobs from a JobStore"""
+
+    def __init__(self, store: JobStore, plans: Dict[str, JobPlan], workers: int = 2,
+                 poll_interval_s: float = 0.5):
+        self.store = store
+        self.plans = plans
+        self.workers = workers
+        self.poll_interval_s = poll_interval_s
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, kind: str, params: Dict) -> str:
+        if kind not in self.plans:
+            raise ValueError(f"Unknown job kind '{kind}', expected one of {sorted(self.plans)}")
+        job_id = self.store.submit(kind, params)
+        self._wake.set()
+        return job_id
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        # Keep leases alive while a single unit runs longer than the lease
+        thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the units in progress; unfinished jobs are requeued"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.store.release(self.owner)
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.store.lease_s / 4):
+            try:
+                self.store.heartbeat(self.owner)
+            except sqlite3.OperationalError:
+                continue
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim(self.owner)
+            except sqlite3.OperationalError:
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval_s)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, any]):
+        try:
+            total, run_unit = self.plans[job["kind"]](job["params"])
+            self.store.set_total(job["id"], self.owner, total)
+            # Resume after the last stored unit
+            for unit in range(job["done"], total):
+                if self._stop.is_set():
+                    return
+                if not self.store.store_unit(job["id"], self.owner, unit, run_unit(unit)):
+                    return
+            self.store.finish(job["id"], self.owner)
+        except Exception as e:
+            self.store.finish(job["id"], self.owner, error=f"{type(e).__name__}: {e}")
+
+
+def job_status(job: Dict[str, any]) -> Dict[str, any]:
+    """Public view of a job row"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job_progress(job),
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"]
+    }
+
+
+def job_progress(job: Dict[str, any]) -> Dict[str, any]:
+    total = job["total"]
+    return {
+        "done": job["done"],
+        "total": total,
+        "percent": round(100 * job["done"] / total, 1) if total else (100.0 if job["status"] == "succeeded" else 0.0)
+    }
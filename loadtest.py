@@ -0,0 +1,208 @@
+"""Load-test stub: drive the API in-process with a stub model
+
+Measures response bytes and server CPU per request for the main endpoints
+with each JSON backend (stdlib, orjson) and content encoding (identity,
+gzip, br). Each backend runs in a fresh process, in a temporary directory
+with a synthetic feedback store, so nothing in the working tree is touched.
+
+Usage:
+    python loadtest.py [--requests 200] [--feedback 20000]
+"""
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+TONES = ["fun", "professional", "semi-fun"]
+PLATFORMS = ["Meta", "Google", "LinkedIn"]
+ENCODINGS = ["identity", "gzip", "br"]
+
+
+class StubModel:
+    """Stands in for Gemini: answers instantly with one section per requested platform"""
+
+    class Response:
+        def __init__(self, text: str):
+            self.text = text
+
+    def generate_content(self, prompt: str, generation_config=None, request_options=None):
+        sections = [
+            f"**{platform}:** Summer shoes are 50% off for a limited time. Step into the season with our "
+            f"whole collection and find your favourite pair today."
+            for platform in PLATFORMS if f"{platform}:" in prompt
+        ]
+        return self.Response("\n\n".join(sections))
+
+
+def write_feedback(path: str, count: int, seed: int = 7):
+    """Synthetic feedback spread over a year, so trends and insights are realistically large"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    entries = []
+    for i in range(count):
+        platforms = rng.sample(PLATFORMS, rng.randint(1, 3))
+        entries.append({
+            "timestamp": (start + timedelta(minutes=26 * i + rng.randint(0, 25))).isoformat(),
+            "ad_text": "Get 50% off on all our summer shoes collection!",
+            "tone": rng.choice(TONES),
+            "platforms": platforms,
+            "rewritten_output": "Summer shoes, half price. Shop the collection now!",
+            "rating": rng.randint(1, 5)
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+
+
+async def call(app, method: str, path: str, query: str = "", body: bytes = b"",
+               headers: Tuple[Tuple[str, str], ...] = ()) -> Tuple[int, bytes, Dict[str, str]]:
+    """One request straight through the ASGI app; returns status, body and headers"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 50000), "server": ("loadtest", 80)
+    }
+    pending = [{"type": "http.request", "body": body, "more_body": False}]
+    result = {"status": 0, "body": [], "headers": {}}
+
+    async def receive():
+        if pending:
+            return pending.pop(0)
+        # The client stays connected until the response is done
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = {name.decode(): value.decode() for name, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            result["body"].append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return result["status"], b"".join(result["body"]), result["headers"]
+
+
+async def run_backend(requests: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Benchmark every endpoint and encoding in this process"""
+    import main
+
+    # Swap the Gemini client for the stub before the warm-up builds it
+    def install_stub():
+        main.model = StubModel()
+    main.warm_up.tasks["model"]["fn"] = install_stub
+
+    ad = json.dumps({"ad_text": "Get 50% off on all our summer shoes collection!",
+                     "tone": "fun", "platforms": PLATFORMS}).encode()
+
+    async with main.lifespan(main.app):
+        if not await asyncio.to_thread(main.warm_up.wait, 60):
+            raise RuntimeError(f"Warm-up failed: {main.warm_up.report()}")
+
+        # A large NDJSON result to stream
+        _, body, _ = await call(main.app, "POST", "/jobs", body=json.dumps({"kind": "rescore_history"}).encode(),
+                                headers=(("content-type", "application/json"),))
+        job_id = json.loads(body)["job_id"]
+        while True:
+            _, body, _ = await call(main.app, "GET", f"/jobs/{job_id}")
+            if json.loads(body)["status"] in ("succeeded", "failed", "dead"):
+                break
+            await asyncio.sleep(0.05)
+
+        cases = {
+            "POST /run-enhanced-agent": lambda i: ("POST", "/run-enhanced-agent", "", ad),
+            # A new query each time: built, serialized and compressed per request
+            "GET /insights (miss)": lambda i: ("GET", "/insights", f"start=2025-01-01T00:00:{i % 60:02d}&end=2026-{1 + i // 60 % 12:02d}-01", b""),
+            "GET /insights (hit)": lambda i: ("GET", "/insights", "", b""),
+            "GET /graph-insights": lambda i: ("GET", "/graph-insights/fun/Meta", "", b""),
+            "GET /jobs/{id}/result": lambda i: ("GET", f"/jobs/{job_id}/result", "", b"")
+        }
+
+        results = {}
+        for name, make in cases.items():
+            results[name] = {}
+            for n, encoding in enumerate(ENCODINGS):
+                headers = (("content-type", "application/json"), ("accept-encoding", encoding))
+                total_bytes = 0
+                # Fresh request numbers per encoding, so misses stay misses
+                first = n * (requests + 1)
+                # Warm code paths first
+                method, path, query, body = make(first + requests)
+                await call(main.app, method, path, query, body, headers)
+                cpu = time.process_time()
+                wall = time.perf_counter()
+                for i in range(first, first + requests):
+                    method, path, query, body = make(i)
+                    status, response, response_headers = await call(main.app, method, path, query, body, headers)
+                    if status != 200:
+                        raise RuntimeError(f"{name} answered {status}")
+                    total_bytes += len(response)
+                results[name][encoding] = {
+                    "bytes": total_bytes / requests,
+                    "cpu_ms": (time.process_time() - cpu) * 1000 / requests,
+                    "wall_ms": (time.perf_counter() - wall) * 1000 / requests,
+                    "content_encoding": response_headers.get("content-encoding", "identity")
+                }
+    return results
+
+
+def child(requests: int):
+    results = asyncio.run(run_backend(requests))
+    print(json.dumps(results))
+
+
+def report(by_backend: Dict[str, Dict], requests: int):
+    baseline = by_backend["stdlib"]
+    print(f"{requests} requests per cell; bytes and CPU per request, saving vs stdlib JSON without compression\n")
+    header = f"{'endpoint':<26} {'backend':<8} {'encoding':<9} {'bytes':>10} {'saved':>7} {'cpu ms':>8} {'saved':>7}"
+    print(header)
+    print("-" * len(header))
+    for name in baseline:
+        base = baseline[name]["identity"]
+        for backend, results in by_backend.items():
+            for encoding in ENCODINGS:
+                row = results[name][encoding]
+                print(f"{name:<26} {backend:<8} {row['content_encoding']:<9} {row['bytes']:>10.0f} "
+                      f"{1 - row['bytes'] / base['bytes']:>7.1%} {row['cpu_ms']:>8.3f} "
+                      f"{1 - row['cpu_ms'] / base['cpu_ms']:>7.1%}")
+        print()
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and encoding")
+    parser.add_argument("--feedback", type=int, default=20000, help="synthetic feedback entries")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.requests)
+        return
+
+    by_backend = {}
+    for backend in ("stdlib", "orjson"):
+        with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+            shutil.copy(os.path.join(REPO, "tone_guidelines.txt"), workdir)
+            write_feedback(os.path.join(workdir, "feedback_store.json"), args.feedback)
+            env = dict(os.environ, JSON_BACKEND=backend, PYTHONPATH=REPO,
+                       COMPRESSION_MIN_SIZE="1024", PROFILER_ADMIN_KEY="")
+            env.pop("SHARED_STATE_DIR", None)
+            output = subprocess.run(
+                [sys.executable, os.path.join(REPO, "loadtest.py"), "--child", "--requests", str(args.requests)],
+                cwd=workdir, env=env, check=True, stdout=subprocess.PIPE, text=True
+            ).stdout
+            by_backend[backend] = json.loads(output.strip().splitlines()[-1])
+    report(by_backend, args.requests)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,22 +1,233 @@
+import time
+
+# Measured from the first line so /ready can report the cost of importing the app
+_import_started = time.perf_counter()
+
 import os
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
+from candidate_selector import CandidateSelector
+from compression import CompressionMiddleware, available, choose_encoding
 from enhanced_prompt_builder import EnhancedPromptBuilder
+from enhanced_retriever import EnhancedRetriever
+from enhanced_knowledge_graph import EnhancedKnowledgeGraph
 from feedback_analyzer import FeedbackAnalyzer
-from google import generativeai as genai
+from feedback_writer import FeedbackWriter
+from jobs import JobRunner, JobStore, job_progress, job_status
+from model_scheduler import ModelScheduler, QueueFull, SchedulerRejected
+from quality_gate import QualityGate
+from request_profiler import ProfilerBusy, RequestProfiler
+from response_cache import ResponseCache
+from warmup import WarmUp
 from datetime import datetime
+from eval import evaluate_batch
+from fast_json import FastJSONResponse
+import anyio.to_thread
+import hmac
 import json
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Set your Gemini API key here (or load via env var in production)
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")
+# Built by the lifespan warm-up below, not at import time
+model = None
+enhanced_builder = None
+feedback_analyzer = None
+quality_gate = None
+candidate_selector = None
+# Set when SHARED_STATE_DIR is configured, for running several uvicorn workers
+shared_state = None
+feedback_writer = None
+job_runner = None
+insights_cache = ResponseCache()
+
+# Every model call goes through the scheduler: interactive before bulk,
+# fair across API keys, bounded queues
+model_scheduler = ModelScheduler(
+    concurrency=int(os.getenv("MODEL_CONCURRENCY", "4")),
+    tenant_weights=json.loads(os.getenv("TENANT_WEIGHTS", "{}"))
+)
+
+# On-demand profiling of /run-enhanced-agent; the admin endpoint is off unless a key is set
+PROFILER_ADMIN_KEY = os.getenv("PROFILER_ADMIN_KEY")
+profiler = RequestProfiler()
+
+# Response compression: encodings in preference order, and the smallest body worth compressing
+COMPRESSION_ENCODINGS = available(os.getenv("COMPRESSION", "br,gzip").split(","))
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
 
-app = FastAPI()
+# Speculative generation: most candidates per request, and how long to wait for them
+MAX_CANDIDATES = int(os.getenv("MAX_CANDIDATES", "4"))
+CANDIDATE_WINDOW_MS = float(os.getenv("CANDIDATE_WINDOW_MS", "12000"))
+
+# How long a request waits for the warm-up before giving up with a 503
+WARMUP_WAIT_S = float(os.getenv("WARMUP_WAIT_S", "30"))
+
+startup_metrics = {
+    "import_ms": None,
+    "first_request_ms": None,
+    "first_request_path": None
+}
+
+def _elapsed_ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 2)
+
+def _load_model():
+    global model
+    # Imported here: the Gemini SDK is by far the slowest import of the app
+    from google import generativeai as genai
+    
+    # Set your Gemini API key here (or load via env var in production)
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    model = genai.GenerativeModel("gemini-2.5-flash")
+
+def _build_warm_up() -> WarmUp:
+    """Start-up tasks; independent components are built in parallel"""
+    parts = {}
+    warm_up = WarmUp()
+    
+    def build_retriever():
+        parts["retriever"] = EnhancedRetriever()
+        
+    def build_knowledge_graph():
+        # Starts from the last saved graph version, if any
+        parts["knowledge_graph"] = EnhancedKnowledgeGraph(
+            snapshot_path=os.getenv("GRAPH_SNAPSHOT", "knowledge_graph.snapshot")
+        )
+        
+    def precompute_retrievals():
+        # Every tone and platform selection the graph knows about
+        nodes = parts["knowledge_graph"].nodes
+        parts["retriever"].precompute(
+            [name for name, node in nodes.items() if node["type"] == "tone"],
+            [name for name, node in nodes.items() if node["type"] == "platform"]
+        )
+        
+    def learn_graph_weights():
+        # Readers get learned weights from the writer's snapshot
+        if shared_state is None or shared_state.is_writer:
+            parts["knowledge_graph"].learn_from_feedback(parts["feedback_analyzer"].get_weight_table())
+        
+    def build_shared_state():
+        global shared_state
+        directory = os.getenv("SHARED_STATE_DIR")
+        if directory:
+            # Only multi-worker deployments need it, and it needs POSIX file locks
+            from shared_state import SharedState
+            shared_state = SharedState(directory)
+        
+    def build_feedback_analyzer():
+        # Readers map the writer's snapshot instead of loading the store themselves
+        load = shared_state is None or shared_state.is_writer
+        parts["feedback_analyzer"] = FeedbackAnalyzer(load=load)
+        
+    def build_prompt_builder():
+        global enhanced_builder, feedback_analyzer, quality_gate, candidate_selector
+        builder = EnhancedPromptBuilder(
+            parts["retriever"], parts["knowledge_graph"], parts["feedback_analyzer"]
+        )
+        # Share the builder's analyzer so new feedback reaches prompts and insights alike
+        feedback_analyzer = builder.feedback_analyzer
+        quality_gate = QualityGate(
+            builder.knowledge_graph,
+            latency_budget_ms=float(os.getenv("QUALITY_GATE_BUDGET_MS", "15000"))
+        )
+        candidate_selector = CandidateSelector(quality_gate, log_file=os.getenv("CANDIDATE_LOG", "candidate_choices.jsonl"))
+        enhanced_builder = builder
+        
+    def start_feedback_writer():
+        global feedback_writer
+        feedback_writer = FeedbackWriter(
+            "feedback_store.json",
+            _apply_feedback_batch,
+            durability=os.getenv("FEEDBACK_DURABILITY", "commit"),
+            max_batch=int(os.getenv("FEEDBACK_MAX_BATCH", "100")),
+            max_wait_ms=float(os.getenv("FEEDBACK_MAX_WAIT_MS", "10"))
+        )
+        
+    def start_job_runner():
+        global job_runner
+        job_runner = JobRunner(
+            JobStore(os.getenv("JOBS_DB", "jobs.db"), max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3"))),
+            {
+                "rewrite_catalogue": _plan_rewrite_catalogue,
+                "rescore_history": _plan_rescore_history,
+                "export_insights": _plan_export_insights
+            },
+            workers=int(os.getenv("JOB_WORKERS", "2"))
+        )
+        # Picks up queued jobs and ones left unfinished by a previous run
+        job_runner.start()
+        
+    def start_shared_state():
+        if shared_state is not None:
+            shared_state.start(parts["feedback_analyzer"], parts["retriever"], parts["knowledge_graph"])
+        
+    warm_up.add("model", _load_model)
+    warm_up.add("retriever", build_retriever)
+    warm_up.add("knowledge_graph", build_knowledge_graph)
+    warm_up.add("shared_state", build_shared_state)
+    warm_up.add("feedback_analyzer", build_feedback_analyzer, after=["shared_state"])
+    warm_up.add("guideline_index", lambda: parts["retriever"].build_index(), after=["retriever"])
+    warm_up.add("retrieval_cache", precompute_retrievals, after=["guideline_index", "knowledge_graph"])
+    warm_up.add("weight_table", lambda: parts["feedback_analyzer"].get_weight_table(), after=["feedback_analyzer"])
+    warm_up.add("graph_weights", learn_graph_weights, after=["knowledge_graph", "weight_table"])
+    warm_up.add("pattern_analysis", lambda: parts["feedback_analyzer"].get_pattern_analysis(), after=["feedback_analyzer"])
+    warm_up.add("prompt_builder", build_prompt_builder,
+                after=["retriever", "knowledge_graph", "feedback_analyzer"])
+    warm_up.add("snapshot", start_shared_state,
+                after=["prompt_builder", "guideline_index", "graph_weights", "pattern_analysis"])
+    warm_up.add("feedback_writer", start_feedback_writer, after=["snapshot"])
+    warm_up.add("jobs", start_job_runner, after=["model", "feedback_writer"])
+    return warm_up
+
+warm_up = _build_warm_up()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Model calls block sync endpoint threads; keep threads free for the rest even with every queue full
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, model_scheduler.max_threads + 8)
+    # Serve /ready while warming up; other endpoints wait for it
+    warm_up.start()
+    yield
+    # Requeue unfinished jobs, then flush queued feedback before the snapshot writer goes away
+    if job_runner is not None:
+        job_runner.stop(timeout=5)
+    if feedback_writer is not None:
+        feedback_writer.close()
+    if candidate_selector is not None:
+        candidate_selector.close()
+    if shared_state is not None:
+        shared_state.stop()
+
+def _apply_feedback_batch(batch):
+    """Fold a committed batch of feedback into the aggregates"""
+    if shared_state is not None:
+        # The snapshot writer folds the new entries in and republishes
+        shared_state.notify_feedback()
+        return
+    for entry, span in batch:
+        feedback_analyzer.add_feedback(entry, span)
+    # Off the request path: update graph weights and drop the cache entries they affect
+    enhanced_builder.knowledge_graph.learn_from_feedback(feedback_analyzer.get_weight_table())
+    # and analyze the new data version before a prompt needs it
+    feedback_analyzer.get_pattern_analysis()
+
+def _require_ready():
+    """Wait for the warm-up to finish, or fail with 503"""
+    if not warm_up.wait(WARMUP_WAIT_S):
+        raise HTTPException(
+            status_code=503,
+            detail={"message": "Service is warming up", "warm_up": warm_up.report()},
+            headers={"Retry-After": "1"}
+        )
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -27,14 +238,43 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Initialize enhanced components
-enhanced_builder = EnhancedPromptBuilder()
-feedback_analyzer = FeedbackAnalyzer()
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE, encodings=COMPRESSION_ENCODINGS)
+
+class FirstRequestTimer:
+    """Record the latency of the first real request after start-up
+
+    Plain ASGI rather than BaseHTTPMiddleware: once the first request is
+    timed, every call is passed straight through to the app.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (startup_metrics["first_request_ms"] is not None or scope["type"] != "http"
+                or scope["path"] == "/ready"):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_timed(message):
+            await send(message)
+            # Timed up to the last body chunk, so streamed responses count whole
+            if (message["type"] == "http.response.body" and not message.get("more_body", False)
+                    and startup_metrics["first_request_ms"] is None):
+                startup_metrics["first_request_ms"] = _elapsed_ms(started)
+                startup_metrics["first_request_path"] = scope["path"]
+
+        await self.app(scope, receive, send_timed)
+
+app.add_middleware(FirstRequestTimer)
 
 class AdRequest(BaseModel):
     ad_text: str
     tone: str
     platforms: List[str]
+    candidates: int = 1  # > 1: generate that many concurrently and keep the best
 
 class Feedback(BaseModel):
     ad_text: str
@@ -42,36 +282,226 @@ class Feedback(BaseModel):
     platforms: List[str]
     rewritten_output: str
     rating: int  # 1 to 5
+    choice_id: Optional[str] = None  # From a speculative /run-enhanced-agent response
+
+class JobRequest(BaseModel):
+    kind: str  # rewrite_catalogue, rescore_history or export_insights
+    params: dict = {}
+
+def _scheduling(http_request: Request):
+    """Priority class, tenant and deadline (seconds) for a request's model calls"""
+    priority = http_request.headers.get("x-priority", "interactive")
+    tenant = http_request.headers.get("x-api-key", "anonymous")
+    deadline_ms = http_request.headers.get("x-deadline-ms")
+    if priority not in model_scheduler.classes:
+        raise HTTPException(status_code=400, detail=f"Unknown priority '{priority}'")
+    try:
+        deadline_s = float(deadline_ms) / 1000 if deadline_ms is not None else model_scheduler.classes[priority]["deadline_s"]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="X-Deadline-Ms must be a number")
+    if not 0 < deadline_s < float("inf"):
+        raise HTTPException(status_code=400, detail="X-Deadline-Ms must be a positive number of milliseconds")
+    return priority, tenant, deadline_s
 
 @app.post("/run-enhanced-agent")
-def run_enhanced_agent(request: AdRequest):
+def run_enhanced_agent(request: AdRequest, http_request: Request):
     """Run the agent with enhanced RAG, KG traversal, and adaptive learning"""
+    _require_ready()
+    priority, tenant, deadline_s = _scheduling(http_request)
+    if not 1 <= request.candidates <= MAX_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"candidates must be between 1 and {MAX_CANDIDATES}")
+    args = (request.ad_text, request.tone, request.platforms, priority, tenant, deadline_s, request.candidates)
     try:
-        # Use enhanced prompt builder
-        prompt = enhanced_builder.build_adaptive_prompt(
-            request.ad_text, 
-            request.tone, 
-            request.platforms
+        if profiler.active:
+            # Only while an admin profiling session runs
+            with profiler.record():
+                return FastJSONResponse(_run_agent(*args))
+        return FastJSONResponse(_run_agent(*args))
+    except SchedulerRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _run_agent(ad_text: str, tone: str, platforms: List[str], priority: str, tenant: str,
+               deadline_s: float, candidates: int = 1) -> dict:
+    """Build the prompt, generate, quality-check and annotate one rewrite"""
+    started = time.perf_counter()
+    deadline = started + deadline_s
+    timings = {}
+    
+    # Use enhanced prompt builder
+    stage = time.perf_counter()
+    prompt = enhanced_builder.build_adaptive_prompt(ad_text, tone, platforms)
+    timings["prompt_build"] = _elapsed_ms(stage)
+    
+    # Generate response once the scheduler grants a model slot
+    stage = time.perf_counter()
+    speculation = None
+    if candidates > 1:
+        # No candidate waits or generates past the end of the selection
+        selection_deadline = min(deadline, time.perf_counter() + CANDIDATE_WINDOW_MS / 1000)
+        
+        def generate(temperature, cancelled, candidate_timings):
+            queued = time.perf_counter()
+            with model_scheduler.slot(priority, tenant, selection_deadline - queued) as ticket:
+                candidate_timings["queue_wait_ms"] = _elapsed_ms(queued)
+                # Selection may have ended while this candidate was queued
+                if cancelled.is_set() or time.perf_counter() >= selection_deadline:
+                    return None
+                return model.generate_content(
+                    prompt, generation_config={"temperature": temperature},
+                    request_options={"timeout": min(ticket.remaining(), selection_deadline - time.perf_counter())}
+                ).text
+            
+        text, speculation = candidate_selector.select(
+            ad_text, platforms, candidates, generate, selection_deadline,
+            {"tone": tone, "platforms": platforms, "ad_text": ad_text, "tenant": tenant}
         )
+        chosen = next(c for c in speculation["candidates"] if c["index"] == speculation["chosen"])
+        timings["queue_wait"] = chosen.get("queue_wait_ms")
+    else:
+        with model_scheduler.slot(priority, tenant, deadline - time.perf_counter()) as ticket:
+            timings["queue_wait"] = _elapsed_ms(stage)
+            text = model.generate_content(prompt, request_options={"timeout": ticket.remaining()}).text
+    timings["generation"] = _elapsed_ms(stage)
+    
+    # Check each platform section and regenerate only the failing ones
+    def regenerate(failing, timeout):
+        repair_prompt = enhanced_builder.build_repair_prompt(ad_text, tone, failing)
+        with model_scheduler.slot(priority, tenant, min(timeout, deadline - time.perf_counter())) as ticket:
+            return model.generate_content(repair_prompt, request_options={"timeout": ticket.remaining()}).text
+    
+    stage = time.perf_counter()
+    rewritten_ads, quality = quality_gate.run(ad_text, platforms, text, regenerate, started)
+    timings["quality_gate"] = _elapsed_ms(stage)
+    
+    # Get improvement suggestions
+    suggestions = enhanced_builder.get_improvement_suggestions()
+    timings["total"] = _elapsed_ms(started)
+    
+    result = {
+        "rewritten_ads": rewritten_ads,
+        "metadata": {
+            "used_enhanced_features": True,
+            "improvement_suggestions": suggestions[:3],  # Top 3 suggestions
+            "quality_gate": quality,
+            "timings_ms": timings
+        }
+    }
+    if speculation is not None:
+        # Sent back with /feedback to join the rating with the candidate log
+        result["choice_id"] = speculation["choice_id"]
+        result["metadata"]["candidates"] = speculation
+    return result
+
+# Feedback entries scored per rescore_history unit
+RESCORE_CHUNK = 256
+
+def _plan_rewrite_catalogue(params: dict):
+    """One unit per catalogue item, generated at bulk priority"""
+    items = params["items"]
+    
+    def run_unit(i: int) -> List[dict]:
+        item = items[i]
+        for _ in range(10):
+            try:
+                result = _run_agent(
+                    item["ad_text"], item["tone"], item["platforms"], "bulk", params["tenant"],
+                    model_scheduler.classes["bulk"]["deadline_s"], min(item.get("candidates", 1), MAX_CANDIDATES)
+                )
+                return [{"index": i, **result}]
+            except QueueFull as e:
+                # Back off instead of failing the item while the bulk queue is full
+                time.sleep(e.retry_after_s or 1)
+            except Exception as e:
+                return [{"index": i, "error": str(e)}]
+        return [{"index": i, "error": "bulk queue stayed full"}]
         
-        # Generate response
-        response = model.generate_content(prompt)
+    return len(items), run_unit
+
+def _plan_rescore_history(params: dict):
+    """Score stored feedback rewrites with the eval.py metrics, in chunks"""
+    # Each unit reads only its own entries' text from the store
+    columns = feedback_analyzer.columns.view()
+    count = min(params["count"], len(columns))
+    
+    def run_unit(i: int) -> List[dict]:
+        start = i * RESCORE_CHUNK
+        chunk = columns.load_range(start, min(start + RESCORE_CHUNK, count))
+        scores = evaluate_batch(
+            [entry.get("ad_text", "") for entry in chunk],
+            [entry.get("rewritten_output", "") for entry in chunk]
+        )
+        return [{
+            "index": start + j,
+            "timestamp": entry.get("timestamp"),
+            "tone": entry.get("tone"),
+            "platforms": entry.get("platforms", []),
+            "rating": entry.get("rating"),
+            **{metric: float(values[j]) for metric, values in scores.items()}
+        } for j, entry in enumerate(chunk)]
         
-        # Get improvement suggestions
-        suggestions = enhanced_builder.get_improvement_suggestions()
+    return -(-count // RESCORE_CHUNK), run_unit
+
+def _plan_export_insights(params: dict):
+    """Write feedback_insights.json and return the insights as the result"""
+    return 1, lambda i: [feedback_analyzer.export_insights()]
+
+@app.post("/jobs", status_code=202)
+def submit_job(job: JobRequest, http_request: Request):
+    """Queue a long-running job; poll /jobs/{job_id} and fetch /jobs/{job_id}/result"""
+    _require_ready()
+    params = dict(job.params)
+    params["tenant"] = http_request.headers.get("x-api-key", "anonymous")
+    
+    if job.kind == "rewrite_catalogue":
+        try:
+            params["items"] = [AdRequest(**item).model_dump() for item in params.get("items", [])]
+        except (TypeError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid catalogue items: {e}")
+    elif job.kind == "rescore_history":
+        # Pin the entries to score so a resumed job covers the same history
+        params["count"] = len(feedback_analyzer.columns)
         
-        return {
-            "rewritten_ads": response.text,
-            "metadata": {
-                "used_enhanced_features": True,
-                "improvement_suggestions": suggestions[:3]  # Top 3 suggestions
-            }
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    try:
+        job_id = job_runner.submit(job.kind, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_id": job_id, "status": "queued"}
+
+def _get_job(job_id: str) -> dict:
+    _require_ready()
+    job = job_runner.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Job status, progress and timestamps"""
+    return job_status(_get_job(job_id))
+
+@app.get("/jobs/{job_id}/progress")
+def get_job_progress(job_id: str):
+    """Units done out of the total"""
+    job = _get_job(job_id)
+    return {"status": job["status"], **job_progress(job)}
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str, partial: bool = False):
+    """Stream job results as NDJSON; partial=true streams what is done so far"""
+    job = _get_job(job_id)
+    if job["status"] != "succeeded" and not partial:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return StreamingResponse(
+        job_runner.store.results(job_id),
+        media_type="application/x-ndjson",
+        headers={"X-Job-Status": job["status"]}
+    )
 
 @app.post("/feedback")
 def submit_feedback(feedback: Feedback):
+    _require_ready()
     entry = {
         "timestamp": datetime.now().isoformat(),
         "ad_text": feedback.ad_text,
@@ -80,47 +510,90 @@ def submit_feedback(feedback: Feedback):
         "rewritten_output": feedback.rewritten_output,
         "rating": feedback.rating
     }
+    if feedback.choice_id is not None:
+        entry["choice_id"] = feedback.choice_id
 
     try:
-        with open("feedback_store.json", "r+", encoding="utf-8") as f:
-            data = json.load(f)
-            data.append(entry)
-            f.seek(0)
-            json.dump(data, f, indent=2)
+        # Group-committed by the background writer; waits for the write
+        # unless FEEDBACK_DURABILITY=enqueue
+        feedback_writer.submit(entry)
         return {"message": "Feedback submitted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error storing feedback: {str(e)}")
 
 @app.get("/insights")
-def get_insights():
-    """Get insights from feedback analysis"""
+def get_insights(request: Request, tone: Optional[str] = None, platform: Optional[str] = None,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Get insights from feedback analysis
+
+    Cached per feedback data version and query, with ETag/Last-Modified
+    validators so repeated polls get a 304 without recomputing anything.
+    """
+    _require_ready()
     try:
-        analysis = feedback_analyzer.analyze_patterns()
-        trends = feedback_analyzer.get_time_based_trends()
-        weights = feedback_analyzer.get_adaptive_weights()
-        
-        return {
-            "analysis_summary": {
-                "total_feedback": analysis.get("total_feedback", 0),
-                "average_rating": round(analysis.get("average_rating", 0), 2),
-                "recommendations": analysis.get("recommendations", [])[:5]
-            },
-            "performance_by_tone": analysis.get("tone_stats", {}),
-            "performance_by_platform": analysis.get("platform_stats", {}),
-            "winning_combinations": analysis.get("high_performing_patterns", []),
-            "needs_improvement": analysis.get("low_performing_patterns", []),
-            "adaptive_weights": weights,
-            "recent_trends": trends
-        }
+        cached = insights_cache.get_or_build(
+            (tone, platform, start, end),
+            lambda: feedback_analyzer.version,
+            lambda: _build_insights(tone, platform, start, end),
+            lambda: feedback_analyzer.updated_at
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+        
+    # Compressed once per version and encoding, not per poll
+    negotiated = bool(COMPRESSION_ENCODINGS) and len(cached.body) >= COMPRESSION_MIN_SIZE
+    encoding = choose_encoding(request.headers.get("accept-encoding"), COMPRESSION_ENCODINGS) if negotiated else None
+    headers = cached.headers_for(encoding, negotiated)
+    if cached.not_modified(request.headers):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.encoded(encoding), media_type="application/json", headers=headers)
+
+def _build_insights(tone: Optional[str], platform: Optional[str],
+                    start: Optional[datetime], end: Optional[datetime]) -> dict:
+    """Assemble the /insights payload for a subset of the feedback"""
+    analysis = feedback_analyzer.analyze_patterns(tone=tone, platform=platform, start=start, end=end)
+    trends = feedback_analyzer.get_time_based_trends(start=start, end=end, tone=tone, platform=platform)
+    # Weights describe whole tone/platform combos, so only tone and platform narrow them
+    weights = {
+        combo: weight for combo, weight in feedback_analyzer.get_adaptive_weights().items()
+        if (tone is None or combo.startswith(f"{tone}_")) and (platform is None or combo.endswith(f"_{platform}"))
+    }
+    
+    return {
+        "analysis_summary": {
+            "total_feedback": analysis.get("total_feedback", 0),
+            "average_rating": round(analysis.get("average_rating", 0), 2),
+            "recommendations": analysis.get("recommendations", [])[:5]
+        },
+        "performance_by_tone": analysis.get("tone_stats", {}),
+        "performance_by_platform": analysis.get("platform_stats", {}),
+        "winning_combinations": analysis.get("high_performing_patterns", []),
+        "needs_improvement": analysis.get("low_performing_patterns", []),
+        "adaptive_weights": weights,
+        "recent_trends": trends
+    }
+
+@app.get("/trends")
+def get_trends(granularity: str = "day", start: Optional[datetime] = None, end: Optional[datetime] = None,
+               tone: Optional[str] = None, platform: Optional[str] = None):
+    """Get rating trends from the time-bucketed feedback rollups"""
+    _require_ready()
+    try:
+        return feedback_analyzer.get_time_based_trends(
+            granularity, start=start, end=end, tone=tone, platform=platform
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/graph-insights/{tone}/{platform}")
 def get_graph_insights(tone: str, platform: str):
     """Get knowledge graph insights for a specific tone-platform combination"""
+    _require_ready()
     try:
-        from enhanced_knowledge_graph import EnhancedKnowledgeGraph
-        kg = EnhancedKnowledgeGraph()
+        # The served graph, with weights learned from feedback
+        kg = enhanced_builder.knowledge_graph
         
         recommendations = kg.get_recommendations(tone, platform)
         relationship = kg.explain_relationship(tone, platform)
@@ -129,7 +602,7 @@ def get_graph_insights(tone: str, platform: str):
         tone_related = kg.traverse_bfs(tone, max_depth=2)
         platform_related = kg.traverse_bfs(platform, max_depth=2)
         
-        return {
+        return FastJSONResponse({
             "tone_platform_analysis": {
                 "tone": tone,
                 "platform": platform,
@@ -137,13 +610,56 @@ def get_graph_insights(tone: str, platform: str):
                 "relationship_explanation": relationship,
                 "suggestions": recommendations["suggested_elements"],
                 "warnings": recommendations["warnings"],
-                "recommended_creative_types": recommendations["creative_types"]
+                "recommended_creative_types": recommendations["creative_types"],
+                "learned_from_feedback": kg.learned.get((tone, platform))
             },
             "graph_connections": {
                 "tone_connections": list(tone_related.keys()),
                 "platform_connections": list(platform_related.keys())
-            }
-        }
+            },
+            "graph_version": kg.version
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/admin/profile")
+def profile_requests(http_request: Request, seconds: float = 10.0, requests: int = 0,
+                     mode: str = "sampling", interval_ms: float = 5.0, top: int = 30,
+                     format: str = "json"):
+    """Profile /run-enhanced-agent in this worker for `seconds`, or until `requests` have finished"""
+    if not PROFILER_ADMIN_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(http_request.headers.get("x-admin-key", "").encode(), PROFILER_ADMIN_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Admin key required")
+    try:
+        report = profiler.run(seconds, requests, mode, interval_ms, top)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "collapsed":
+        # Feed straight into flamegraph.pl or speedscope
+        return PlainTextResponse(report["collapsed"] + "\n")
+    return report
+
+@app.get("/metrics")
+def get_metrics():
+    """Scheduler queue and throughput metrics, plus feedback writer and cache counters"""
+    return {
+        "model_scheduler": model_scheduler.metrics(),
+        "feedback_writer": feedback_writer.stats if feedback_writer is not None else None,
+        "insights_cache": {"hits": insights_cache.hits, "misses": insights_cache.misses},
+        "retrieval_cache": enhanced_builder.retriever.cache_stats() if enhanced_builder is not None else None
+    }
+
+@app.get("/ready")
+def readiness():
+    """Report warm-up status; 503 until every start-up task has finished"""
+    report = warm_up.report()
+    report.update(startup_metrics)
+    if shared_state is not None:
+        report["shared_state"] = shared_state.status()
+    status_code = 200 if warm_up.ready else 503
+    return JSONResponse(content=report, status_code=status_code)
+
+startup_metrics["import_ms"] = _elapsed_ms(_import_started)
@@ -0,0 +1,237 @@
+from typing import Dict, List, Optional
+from collections import deque
+from contextlib import contextmanager
+import threading
+import heapq
+import math
+import time
+
+# Lower rank is served first. Every queued or running call blocks a thread,
+# so the queues stay small: with 4 running calls they fit in anyio's
+# default 40 worker threads with room left for the other endpoints.
+PRIORITY_CLASSES = {
+    "interactive": {"rank": 0, "max_queued": 24, "max_running": None, "deadline_s": 30.0},
+    "bulk": {"rank": 1, "max_queued": 8, "max_running": -1, "deadline_s": 600.0}
+}
+
+
+class SchedulerRejected(Exception):
+    """A model call was not admitted; carries the HTTP status to answer with"""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after_s: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        if self.retry_after_s is None:
+            return {}
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after_s)))}
+
+
+class QueueFull(SchedulerRejected):
+    status_code = 429
+
+
+class DeadlineExceeded(SchedulerRejected):
+    status_code = 504
+
+
+class Ticket:
+    """One queued or running model call"""
+
+    def __init__(self, priority: str, tenant: str, deadline: float, finish_tag: float):
+        self.priority = priority
+        self.tenant = tenant
+        self.deadline = deadline
+        self.finish_tag = finish_tag
+        self.enqueued_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self.cancelled = False
+        self.event = threading.Event()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def __lt__(self, other: "Ticket") -> bool:
+        return (self.finish_tag, self.enqueued_at) < (other.finish_tag, other.enqueued_at)
+
+
+class ModelScheduler:
+    """Admission control in front of the model
+
+    At most `concurrency` calls run at once. Waiting calls are served by
+    priority class first (interactive before bulk), and within a class by
+    weighted fair queuing across tenants: each call gets a virtual finish
+    tag of max(class clock, tenant's last tag) + 1 / tenant weight, and the
+    smallest tag runs next. A class's max_running caps how many slots it
+    may hold; a negative value reserves that many slots for other classes,
+    even if that leaves the class none, and its calls are then rejected.
+    Calls past their deadline are dropped from the queue, and classes with
+    a full queue reject new calls with a Retry-After estimate.
+    """
+
+    def __init__(self, concurrency: int = 4, classes: Optional[Dict[str, Dict]] = None,
+                 tenant_weights: Optional[Dict[str, float]] = None, throughput_window_s: float = 60.0):
+        self.concurrency = concurrency
+        self.classes = classes or PRIORITY_CLASSES
+        self.tenant_weights = tenant_weights or {}
+        self.throughput_window_s = throughput_window_s
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, List[Ticket]] = {name: [] for name in self.classes}
+        self._queued = {name: 0 for name in self.classes}
+        self._running = {name: 0 for name in self.classes}
+        self._clock = {name: 0.0 for name in self.classes}
+        self._tenant_tags: Dict[str, Dict[str, float]] = {name: {} for name in self.classes}
+        self._order = sorted(self.classes, key=lambda name: self.classes[name]["rank"])
+
+        self._stats = {name: {
+            "admitted": 0, "completed": 0, "rejected": 0, "expired": 0,
+            "wait_ms_total": 0.0, "wait_ms_max": 0.0, "service_ms_total": 0.0
+        } for name in self.classes}
+        self._recent_waits = {name: deque(maxlen=1000) for name in self.classes}
+        self._completions = {name: deque() for name in self.classes}
+
+    @property
+    def max_threads(self) -> int:
+        """Most threads that can be blocked in the scheduler at once, queued or running"""
+        return self.concurrency + sum(config["max_queued"] for config in self.classes.values())
+
+    @contextmanager
+    def slot(self, priority: str = "interactive", tenant: str = "anonymous",
+             deadline_s: Optional[float] = None):
+        """Wait for a model slot; the body of the with-block is the model call"""
+        ticket = self._acquire(priority, tenant, deadline_s)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def metrics(self) -> Dict[str, any]:
+        """Queue depth, wait times and throughput per priority class"""
+        now = time.monotonic()
+        with self._lock:
+            classes = {}
+            for name in self.classes:
+                stats = self._stats[name]
+                completions = self._completions[name]
+                while completions and completions[0] < now - self.throughput_window_s:
+                    completions.popleft()
+                waits = sorted(self._recent_waits[name])
+                admitted = stats["admitted"]
+                classes[name] = {
+                    "queued": self._queued[name],
+                    "running": self._running[name],
+                    "admitted": admitted,
+                    "completed": stats["completed"],
+                    "rejected": stats["rejected"],
+                    "expired": stats["expired"],
+                    "wait_ms_avg": round(stats["wait_ms_total"] / admitted, 2) if admitted else 0.0,
+                    "wait_ms_p50": round(_percentile(waits, 0.5), 2),
+                    "wait_ms_p95": round(_percentile(waits, 0.95), 2),
+                    "wait_ms_max": round(stats["wait_ms_max"], 2),
+                    "throughput_per_s": round(len(completions) / self.throughput_window_s, 3)
+                }
+            return {"concurrency": self.concurrency, "classes": classes}
+
+    def _acquire(self, priority: str, tenant: str, deadline_s: Optional[float]) -> Ticket:
+        config = self.classes.get(priority)
+        if config is None:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {list(self.classes)}")
+        deadline_s = config["deadline_s"] if deadline_s is None else deadline_s
+        if not deadline_s > 0:
+            with self._lock:
+                self._stats[priority]["expired"] += 1
+            raise DeadlineExceeded(f"{priority} request reached its deadline before being queued")
+        if self._class_limit(priority) == 0:
+            raise SchedulerRejected(
+                f"All {self.concurrency} model slots are reserved for other classes than {priority}"
+            )
+
+        with self._lock:
+            if self._queued[priority] >= config["max_queued"]:
+                self._stats[priority]["rejected"] += 1
+                raise QueueFull(f"Too many queued {priority} requests", self._retry_after(priority))
+
+            # Weighted fair queuing: virtual finish tag per tenant within the class
+            weight = self.tenant_weights.get(tenant, 1.0)
+            start_tag = max(self._clock[priority], self._tenant_tags[priority].get(tenant, 0.0))
+            ticket = Ticket(priority, tenant, time.monotonic() + deadline_s, start_tag + 1.0 / weight)
+            self._tenant_tags[priority][tenant] = ticket.finish_tag
+
+            heapq.heappush(self._queues[priority], ticket)
+            self._queued[priority] += 1
+            self._dispatch()
+
+        if not ticket.event.wait(ticket.remaining()):
+            with self._lock:
+                if ticket.granted_at is None:
+                    # Still queued at the deadline: drop it lazily from the heap
+                    ticket.cancelled = True
+                    self._queued[priority] -= 1
+                    self._stats[priority]["expired"] += 1
+                    raise DeadlineExceeded(f"{priority} request waited past its deadline", self._retry_after(priority))
+        return ticket
+
+    def _release(self, ticket: Ticket):
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats[ticket.priority]
+            self._running[ticket.priority] -= 1
+            stats["completed"] += 1
+            stats["service_ms_total"] += (now - ticket.granted_at) * 1000
+            self._completions[ticket.priority].append(now)
+            self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiting tickets; caller holds the lock"""
+        while sum(self._running.values()) < self.concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            ticket.granted_at = time.monotonic()
+            wait_ms = (ticket.granted_at - ticket.enqueued_at) * 1000
+            stats = self._stats[ticket.priority]
+            stats["admitted"] += 1
+            stats["wait_ms_total"] += wait_ms
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+            self._recent_waits[ticket.priority].append(wait_ms)
+            self._queued[ticket.priority] -= 1
+            self._running[ticket.priority] += 1
+            self._clock[ticket.priority] = ticket.finish_tag
+            ticket.event.set()
+
+    def _next_ticket(self) -> Optional[Ticket]:
+        for name in self._order:
+            if self._running[name] >= self._class_limit(name):
+                continue
+            queue = self._queues[name]
+            while queue:
+                ticket = heapq.heappop(queue)
+                if not ticket.cancelled:
+                    return ticket
+        return None
+
+    def _class_limit(self, name: str) -> int:
+        max_running = self.classes[name]["max_running"]
+        if max_running is None:
+            return self.concurrency
+        if max_running < 0:
+            return max(self.concurrency + max_running, 0)
+        return max_running
+
+    def _retry_after(self, priority: str) -> float:
+        """Rough time until the current queue drains; caller holds the lock"""
+        stats = self._stats[priority]
+        service_s = stats["service_ms_total"] / stats["completed"] / 1000 if stats["completed"] else 1.0
+        return (self._queued[priority] + 1) * service_s / self._class_limit(priority)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(q * len(values)), len(values) - 1)]
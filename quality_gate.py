@@ -0,0 +1,189 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from eval import ReferenceScorer
+import time
+import re
+
+# Emoji and pictograph ranges (plus the emoji presentation selector)
+_EMOJI_PATTERN = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\uFE0F]")
+
+# Markdown decoration models put around platform labels, e.g. "**Meta:**"
+_DECORATION = " \t\r\n*#_>"
+
+
+class QualityGate:
+    """Inline post-generation checks for per-platform ad sections"""
+
+    def __init__(self, knowledge_graph, max_hallucination: float = 0.2,
+                 min_relevance: float = 0.5, latency_budget_ms: float = 15000,
+                 min_regeneration_ms: float = 1500, max_rounds: int = 1):
+        self.knowledge_graph = knowledge_graph
+        self.max_hallucination = max_hallucination
+        self.min_relevance = min_relevance
+        self.latency_budget_ms = latency_budget_ms
+        self.min_regeneration_ms = min_regeneration_ms
+        self.max_rounds = max_rounds
+
+    def parse_sections(self, text: str, platforms: List[str]) -> Dict[str, Tuple[int, int]]:
+        """Locate each platform's section as a (start, end) span in the text"""
+        # An empty alternative would turn every ":" into a label
+        platforms = [p for p in platforms if p]
+        if not platforms:
+            return {}
+        # Same convention as the frontend: "<Platform>:" up to the next label
+        label = re.compile(
+            r"(" + "|".join(re.escape(p) for p in platforms) + r")\s*[*_]*\s*:", re.IGNORECASE
+        )
+        labels = []
+        for match in label.finditer(text):
+            platform = next((p for p in platforms if p.lower() == match.group(1).lower()), None)
+            if platform is None:
+                # Matched only under regex case folding, e.g. "ſ" (long s) for "s"
+                continue
+            labels.append((match.start(), match.end(), platform))
+
+        spans = {}
+        seen = set()
+        for i, (_, end, platform) in enumerate(labels):
+            if platform in seen:
+                continue
+            seen.add(platform)
+            stop = labels[i + 1][0] if i + 1 < len(labels) else len(text)
+            # Trim whitespace and markdown left around the section body
+            while end < stop and text[end] in _DECORATION:
+                end += 1
+            while stop > end and text[stop - 1] in _DECORATION:
+                stop -= 1
+            spans[platform] = (end, stop)
+
+        return spans
+
+    def check_section(self, platform: str, section: str, scorer: ReferenceScorer) -> Dict[str, any]:
+        """Check one section against platform rules and quality heuristics"""
+        props = self.knowledge_graph.nodes.get(platform, {}).get("properties", {})
+        issues = []
+
+        char_limit = props.get("char_limit")
+        if char_limit is not None and len(section) > char_limit:
+            issues.append(f"exceeds {platform} character limit ({len(section)}/{char_limit})")
+
+        if props.get("emoji_friendly") is False and _EMOJI_PATTERN.search(section):
+            issues.append(f"contains emojis, which {platform} does not support well")
+
+        hallucination = scorer.hallucination(section)
+        relevance = scorer.relevance(section)
+
+        if hallucination > self.max_hallucination:
+            issues.append(f"introduces claims not in the original (hallucination: {hallucination:.2f})")
+
+        if relevance < self.min_relevance:
+            issues.append(f"drops key concepts from the original (relevance: {relevance:.2f})")
+
+        return {
+            "passed": not issues,
+            "issues": issues,
+            "length": len(section),
+            "hallucination": hallucination,
+            "relevance": relevance
+        }
+
+    def review(self, ad_text: str, platforms: List[str], text: str,
+               scorer: Optional[ReferenceScorer] = None) -> Dict[str, Dict]:
+        """Check every platform section of a generated response"""
+        scorer = scorer or ReferenceScorer(ad_text)
+        spans = self.parse_sections(text, platforms)
+        results = {}
+
+        for platform in platforms:
+            if platform not in spans:
+                results[platform] = {
+                    "passed": False,
+                    "issues": [f"no section found for {platform}"],
+                    "length": 0,
+                    "hallucination": 0.0,
+                    "relevance": 0.0
+                }
+                continue
+
+            start, end = spans[platform]
+            results[platform] = self.check_section(platform, text[start:end], scorer)
+
+        return results
+
+    def run(self, ad_text: str, platforms: List[str], text: str,
+            regenerate: Callable[[Dict[str, List[str]], float], str],
+            started: float) -> Tuple[str, Dict[str, any]]:
+        """Review a response and regenerate failing sections within the latency budget
+
+        `regenerate` receives the failing platforms with their issues and a
+        timeout in seconds, and returns text in the same per-platform format.
+        `started` is the request's time.perf_counter() start.
+        """
+        gate_started = time.perf_counter()
+        scorer = ReferenceScorer(ad_text)
+        results = self.review(ad_text, platforms, text, scorer)
+        regenerated = []
+        regeneration_ms = 0.0
+        rounds = 0
+        budget_exhausted = False
+
+        while rounds < self.max_rounds:
+            failing = {p: r["issues"] for p, r in results.items() if not r["passed"]}
+            if not failing:
+                break
+
+            remaining_ms = self.latency_budget_ms - (time.perf_counter() - started) * 1000
+            if remaining_ms < self.min_regeneration_ms:
+                budget_exhausted = True
+                break
+
+            rounds += 1
+            regen_started = time.perf_counter()
+            try:
+                replacement = regenerate(failing, remaining_ms / 1000)
+            except Exception:
+                # Keep the first draft if regeneration fails or times out
+                break
+            finally:
+                regeneration_ms += (time.perf_counter() - regen_started) * 1000
+
+            new_spans = self.parse_sections(replacement, list(failing))
+            new_results = {}
+            for platform, (start, end) in new_spans.items():
+                new_results[platform] = self.check_section(platform, replacement[start:end], scorer)
+
+            # Splice improved sections back in, last span first so earlier
+            # offsets stay valid
+            spans = self.parse_sections(text, platforms)
+            updates = []
+            for platform, (start, end) in new_spans.items():
+                if not self._improves(new_results[platform], results[platform]):
+                    continue
+                updates.append((platform, replacement[start:end]))
+
+            for platform, section in sorted(updates, key=lambda u: spans.get(u[0], (len(text),))[0], reverse=True):
+                if platform in spans:
+                    start, end = spans[platform]
+                    text = text[:start] + section + text[end:]
+                else:
+                    text = f"{text.rstrip()}\n\n{platform}:\n{section}\n"
+                results[platform] = new_results[platform]
+                regenerated.append(platform)
+
+        report = {
+            "passed": all(r["passed"] for r in results.values()),
+            "sections": results,
+            "regenerated_sections": regenerated,
+            "regeneration_rounds": rounds,
+            "budget_exhausted": budget_exhausted,
+            "timings_ms": {
+                "checks": round((time.perf_counter() - gate_started) * 1000 - regeneration_ms, 2),
+                "regeneration": round(regeneration_ms, 2)
+            }
+        }
+        return text, report
+
+    def _improves(self, new: Dict[str, any], old: Dict[str, any]) -> bool:
+        """Whether a regenerated section is better than the one it replaces"""
+        if new["passed"] != old["passed"]:
+            return new["passed"]
+        return len(new["issues"]) < len(old["issues"])
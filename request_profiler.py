@@ -0,0 +1,206 @@
+from typing import Dict, Optional
+from collections import Counter
+from contextlib import contextmanager
+import threading
+import cProfile
+import pstats
+import time
+import sys
+import os
+
+PROFILE_MODES = ("sampling", "cprofile")
+
+# From Python 3.12 cProfile runs on sys.monitoring: one profiler traces every
+# thread, and only one can be active in the process. Before that it traces
+# only the thread that enabled it.
+PROCESS_WIDE_CPROFILE = sys.version_info >= (3, 12)
+
+
+class ProfilerBusy(Exception):
+    """A profiling session is already running"""
+
+
+class RequestProfiler:
+    """On-demand profiler for the requests that opt in with record()
+
+    While a session runs, a background thread samples the stacks of the
+    threads inside record() every interval_ms, from the record() call
+    down, and folds them into collapsed stacks (one "frame;frame;... count"
+    line each, the input of flamegraph.pl and speedscope). In "cprofile"
+    mode the requests are also traced with cProfile, giving exact call
+    counts and times. Where cProfile is process-wide (Python 3.12+) one
+    profiler runs for the whole session and its stats cover every thread,
+    not just the recorded requests; otherwise each recorded request is
+    traced on its own and the stats are merged. The report's
+    "cprofile_scope" says which. A session ends after the given number of
+    seconds or recorded requests, whichever comes first. Requests that
+    could not be traced are not counted.
+
+    When no session runs, record() is never entered: callers check the
+    active flag, so the cost is one attribute read per request.
+    """
+
+    def __init__(self, max_seconds: float = 300.0):
+        self.max_seconds = max_seconds
+        self.active = False
+        self._lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self._done = threading.Event()
+        self._roots: Dict[int, any] = {}
+        self._reset("sampling", 5.0, 0)
+
+    def run(self, seconds: float, requests: int = 0, mode: str = "sampling",
+            interval_ms: float = 5.0, top: int = 30) -> Dict[str, any]:
+        """Profile for `seconds`, or until `requests` requests finished if > 0; blocks"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {PROFILE_MODES}")
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be in (0, {self.max_seconds}]")
+        if interval_ms < 1:
+            raise ValueError("interval_ms must be at least 1")
+        if not self._session_lock.acquire(blocking=False):
+            raise ProfilerBusy("A profiling session is already running")
+
+        session_profile = None
+        try:
+            self._reset(mode, interval_ms, requests)
+            if mode == "cprofile" and PROCESS_WIDE_CPROFILE:
+                session_profile = cProfile.Profile()
+                try:
+                    session_profile.enable()
+                except ValueError:
+                    session_profile = None
+                    raise ProfilerBusy("Another profiler is active in this process")
+            sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+            started = time.perf_counter()
+            self.active = True
+            sampler.start()
+            self._done.wait(seconds)
+            self.active = False
+            self._done.set()
+            sampler.join()
+            if session_profile is not None:
+                session_profile.disable()
+            with self._lock:
+                elapsed = time.perf_counter() - started
+                if session_profile is not None:
+                    self._stats = pstats.Stats(session_profile)
+                return self._report(elapsed, top)
+        finally:
+            self.active = False
+            if session_profile is not None:
+                # Already off unless the session failed
+                session_profile.disable()
+            self._session_lock.release()
+
+    @contextmanager
+    def record(self):
+        """Profile the body of the with-block while a session is active"""
+        ident = threading.get_ident()
+        # The caller's frame: sampled stacks start below it
+        root = sys._getframe(2)
+        profile = None
+        with self._lock:
+            recording = self.active
+            if recording:
+                self._roots[ident] = root
+                # Otherwise the session's profiler, if any, traces the request
+                per_request = self._mode == "cprofile" and not PROCESS_WIDE_CPROFILE
+        if not recording:
+            yield
+            return
+        if per_request:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiling tool holds this thread
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            with self._lock:
+                self._roots.pop(ident, None)
+                if profile is not None and self._stats is not None:
+                    self._stats.add(profile)
+                elif profile is not None:
+                    self._stats = pstats.Stats(profile)
+                # A request that was never traced is missing from the stats
+                if profile is not None or not per_request:
+                    self._requests += 1
+                    if self._target_requests and self._requests >= self._target_requests:
+                        self._done.set()
+
+    def _reset(self, mode: str, interval_ms: float, requests: int):
+        with self._lock:
+            self._mode = mode
+            self._interval_s = interval_ms / 1000
+            self._target_requests = requests
+            self._requests = 0
+            self._samples = 0
+            self._stacks: Counter = Counter()
+            self._stats: Optional[pstats.Stats] = None
+            self._roots.clear()
+            self._done.clear()
+
+    def _sample(self):
+        while not self._done.wait(self._interval_s):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, root in self._roots.items():
+                    frame = frames.get(ident)
+                    stack = []
+                    while frame is not None and frame is not root:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    if stack:
+                        self._stacks[";".join(reversed(stack))] += 1
+                        self._samples += 1
+
+    def _report(self, elapsed: float, top: int) -> Dict[str, any]:
+        """Collapsed stacks plus the top functions by cumulative time; caller holds the lock"""
+        interval_ms = self._interval_s * 1000
+        report = {
+            "mode": self._mode,
+            "duration_s": round(elapsed, 3),
+            "requests": self._requests,
+            "samples": self._samples,
+            "interval_ms": interval_ms,
+            "collapsed": "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common()),
+        }
+
+        if self._mode == "cprofile":
+            report["cprofile_scope"] = "process" if PROCESS_WIDE_CPROFILE else "requests"
+        if self._stats is not None:
+            rows = [
+                {
+                    "function": f"{name} ({os.path.basename(filename)}:{line})",
+                    "calls": calls,
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                    "self_ms": round(own * 1000, 3)
+                }
+                for (filename, line, name), (_, calls, own, cumulative, _) in self._stats.stats.items()
+            ]
+        else:
+            # Estimated from the samples: a function's cumulative time is every sample it is on
+            cumulative, own = Counter(), Counter()
+            for stack, count in self._stacks.items():
+                frames = stack.split(";")
+                for frame in set(frames):
+                    cumulative[frame] += count
+                own[frames[-1]] += count
+            rows = [
+                {
+                    "function": frame,
+                    "samples": count,
+                    "cumulative_ms": round(count * interval_ms, 3),
+                    "self_ms": round(own[frame] * interval_ms, 3)
+                }
+                for frame, count in cumulative.items()
+            ]
+        rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+        report["top_functions"] = rows[:top]
+        return report
@@ -0,0 +1,102 @@
+from typing import Callable, Dict, Hashable, Mapping, Optional
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.datastructures import MutableHeaders
+from compression import compress, mark_encoded
+from fast_json import dumps
+import threading
+import hashlib
+
+
+class CachedResponse:
+    """A pre-serialized JSON body with its validators"""
+
+    def __init__(self, body: bytes, modified_at: float):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        # HTTP dates have one-second resolution
+        self.modified_at = int(modified_at)
+        self.last_modified = formatdate(self.modified_at, usegmt=True)
+        # Compressed bodies, built once per encoding
+        self._encoded: Dict[str, bytes] = {}
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        # no-cache: clients may store it but must revalidate, which is a cheap 304
+        return {"ETag": self.etag, "Last-Modified": self.last_modified, "Cache-Control": "no-cache"}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        """The body compressed with encoding (None for the plain body)"""
+        if encoding is None:
+            return self.body
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+    def headers_for(self, encoding: Optional[str], negotiated: bool = True) -> Dict[str, str]:
+        """Validators and cache headers for the body in the given encoding
+
+        negotiated: whether the encoding was picked from Accept-Encoding, so
+        caches must vary on it even when the plain body is sent.
+        """
+        headers = MutableHeaders(self.headers)
+        if encoding is not None:
+            mark_encoded(headers, encoding)
+        elif negotiated:
+            headers.add_vary_header("Accept-Encoding")
+        return dict(headers)
+
+    def not_modified(self, request_headers: Mapping[str, str]) -> bool:
+        """Whether a conditional request can be answered with 304"""
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match wins over If-Modified-Since
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= self.modified_at
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class ResponseCache:
+    """Bounded LRU of serialized responses, keyed by data version and query
+
+    An entry is only stored if the data version did not change while it was
+    being built, so a cached body always matches its version.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, version: Callable[[], Hashable],
+                     build: Callable[[], Dict], modified_at: Callable[[], float]) -> CachedResponse:
+        """Cached response for key at the current version, building it on a miss"""
+        built_for = version()
+        full_key = (built_for, key)
+        with self._lock:
+            cached = self._entries.get(full_key)
+            if cached is not None:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        cached = CachedResponse(dumps(build()), modified_at())
+        if version() == built_for:
+            with self._lock:
+                self._entries[full_key] = cached
+                self._entries.move_to_end(full_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return cached
+
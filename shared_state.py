@@ -0,0 +1,379 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+import threading
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # No POSIX file locks (Windows): snapshot files work, SharedState does not
+    fcntl = None
+
+SNAPSHOT_MAGIC = b"ADSNAP01"
+_ALIGN = 64
+
+
+def write_snapshot(path: str, version: int, arrays: Dict[str, np.ndarray], meta: Dict[str, any]):
+    """Write arrays and JSON metadata to a snapshot file, atomically
+
+    Layout: magic, 8-byte header length, JSON header, then each array's raw
+    bytes at a 64-byte aligned offset recorded in the header.
+    """
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    header = json.dumps({"version": version, "meta": meta, "arrays": layout}).encode("utf-8")
+    data_start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Tuple[int, Dict[str, np.ndarray], Dict[str, any]]:
+    """Map a snapshot file read-only; the arrays are views into the mapping"""
+    with open(path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        header_length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_length))
+
+    data_start = -(-(len(SNAPSHOT_MAGIC) + 8 + header_length) // _ALIGN) * _ALIGN
+    mapping = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = data_start + spec["offset"]
+        arrays[name] = mapping[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return header["version"], arrays, header["meta"]
+
+
+def _read_header(path: str) -> Dict[str, any]:
+    with open(path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        header_length = int.from_bytes(f.read(8), "little")
+        return json.loads(f.read(header_length))
+
+
+def append_columns(prefix: str, arrays: Dict[str, np.ndarray],
+                   layout: Dict[str, Dict[str, any]]) -> Dict[str, Dict[str, any]]:
+    """Append each array's rows past its length in layout to the file `{prefix}.{name}.bin`
+
+    Rows already written are never touched, so readers mapping a shorter
+    prefix of a file are unaffected. Returns the new layout: the dtype and
+    shape of every array.
+    """
+    written = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        rows = layout[name]["shape"][0] if name in layout else 0
+        row_bytes = array.itemsize * int(np.prod(array.shape[1:], dtype=np.int64))
+        with open(f"{prefix}.{name}.bin", "a+b") as f:
+            # Drop whatever a publish that never completed left behind
+            f.truncate(rows * row_bytes)
+            f.write(array[rows:].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        written[name] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+    return written
+
+
+def map_columns(prefix: str, layout: Dict[str, Dict[str, any]]) -> Dict[str, np.ndarray]:
+    """Map the prefix of each column file described by layout read-only"""
+    arrays = {}
+    for name, spec in layout.items():
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        if shape[0] == 0:
+            # Empty files cannot be mapped
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(f"{prefix}.{name}.bin", dtype=dtype, mode="r", shape=shape)
+    return arrays
+
+
+class SharedState:
+    """Share guideline embeddings, graph tables and feedback aggregates across workers
+
+    One process per directory holds the writer lock. It folds in feedback
+    appended to the store by any worker and publishes versioned, read-only
+    snapshot files. Every other process maps the current snapshot with
+    np.memmap, so the data lives once in the page cache however many workers
+    run, and all of them serve the same weights. If the writer exits, the
+    first reader to grab the lock takes over.
+
+    The feedback columns grow with every entry, so they are not copied into
+    each snapshot. They live in append-only column files, one per array, and
+    each publish only appends the rows added since the last one. A snapshot
+    records how many rows of each file it covers. A reload or a new writer
+    starts a new generation of column files, and generations no kept
+    snapshot refers to are deleted.
+    """
+
+    CURRENT = "CURRENT"
+    LOCK = "writer.lock"
+
+    def __init__(self, directory: str, interval_s: float = 0.5, keep: int = 3):
+        if fcntl is None:
+            raise RuntimeError("SharedState needs POSIX file locks (fcntl), unavailable on this platform")
+        self.directory = directory
+        self.interval_s = interval_s
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+        self.analyzer = None
+        self.retriever = None
+        self.knowledge_graph = None
+        self.version: Optional[int] = None
+        self._feedback_stat = None
+        self._published_data_version = None
+        # Column files being appended to: {"generation", "source" columns, "layout"}
+        self._column_log: Optional[Dict[str, any]] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._lock_file = open(os.path.join(directory, self.LOCK), "a+")
+        self.is_writer = self._try_lock()
+
+    @property
+    def role(self) -> str:
+        return "writer" if self.is_writer else "reader"
+
+    def start(self, analyzer, retriever, knowledge_graph, wait_s: float = 10.0):
+        """Publish (writer) or attach to (reader) the current snapshot, then keep it in sync"""
+        self.analyzer, self.retriever, self.knowledge_graph = analyzer, retriever, knowledge_graph
+
+        if self.is_writer:
+            self._feedback_stat = self._stat_feedback()
+            self.publish()
+        elif not self._wait_for_snapshot(wait_s):
+            # No writer has published yet; serve from the file until one does
+            self.analyzer.reload()
+
+        self._thread = threading.Thread(target=self._run, name="shared-state", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop syncing and release the writer lock"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._lock_file.close()
+
+    def notify_feedback(self):
+        """Feedback was written to the store; let the writer fold it in now"""
+        self._wake.set()
+
+    def status(self) -> Dict[str, any]:
+        return {"role": self.role, "version": self.version, "directory": self.directory}
+
+    def publish(self):
+        """Write the writer's current state as the next snapshot version"""
+        arrays, meta = {}, {}
+        
+        # Fold the latest feedback into the graph weights first
+        self.knowledge_graph.learn_from_feedback(self.analyzer.get_weight_table())
+        self.analyzer.get_pattern_analysis()
+
+        texts, embeddings = self.retriever.embedding_table()
+        arrays["retriever.embeddings"] = embeddings
+        meta["retriever"] = {"texts": texts, "corpus_version": self.retriever.corpus_version}
+
+        tables, graph_meta = self.knowledge_graph.to_tables()
+        arrays.update({f"graph.{name}": table for name, table in tables.items()})
+        meta["graph"] = graph_meta
+
+        data_version = self.analyzer.version
+        columns = self.analyzer.columns
+        feedback_arrays, feedback_meta = self.analyzer.to_snapshot()
+        column_arrays = {
+            name[len("columns."):]: feedback_arrays.pop(name)
+            for name in list(feedback_arrays) if name.startswith("columns.")
+        }
+        arrays.update({f"feedback.{name}": array for name, array in feedback_arrays.items()})
+        meta["feedback"] = feedback_meta
+        meta["columns"] = self._append_columns(columns, column_arrays)
+
+        version = (self._current_version() or 0) + 1
+        name = f"snapshot-{version:08d}.bin"
+        write_snapshot(os.path.join(self.directory, name), version, arrays, meta)
+        self._write_current(name)
+        self.version = version
+        self._published_data_version = data_version
+        self._remove_old(version)
+
+    def _attach(self, name: str):
+        """Point the local components at a published snapshot"""
+        version, arrays, meta = read_snapshot(os.path.join(self.directory, name))
+        if "columns" not in meta:
+            raise ValueError(f"{name} predates column files")
+        prefix = self._column_prefix(meta["columns"]["generation"])
+        arrays.update({
+            f"feedback.columns.{column}": array
+            for column, array in map_columns(prefix, meta["columns"]["layout"]).items()
+        })
+
+        self.retriever.load_embeddings(
+            meta["retriever"]["texts"], arrays["retriever.embeddings"], meta["retriever"].get("corpus_version")
+        )
+        self.knowledge_graph.load_tables(
+            {key[len("graph."):]: value for key, value in arrays.items() if key.startswith("graph.")},
+            meta["graph"]
+        )
+        self.analyzer.attach_snapshot(
+            {key[len("feedback."):]: value for key, value in arrays.items() if key.startswith("feedback.")},
+            meta["feedback"], version
+        )
+        # Analyze the attached data here rather than on the first request that needs it
+        self.analyzer.get_pattern_analysis()
+        self.version = version
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self._sync()
+            except Exception:
+                # Try again on the next tick, e.g. after a half-written store
+                continue
+
+    def _sync(self):
+        if not self.is_writer and self._try_lock():
+            # The writer went away; take over from the file itself
+            self.is_writer = True
+            self.analyzer.reload()
+            self._feedback_stat = self._stat_feedback()
+            self.publish()
+            return
+
+        if self.is_writer:
+            stat = self._stat_feedback()
+            if stat != self._feedback_stat:
+                self._feedback_stat = stat
+                with open(self.analyzer.feedback_file, "rb") as f:
+                    # Shared lock: /feedback rewrites the file under an exclusive one
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                    self.analyzer.refresh()
+            if self.analyzer.version != self._published_data_version:
+                self.publish()
+        else:
+            name = self._read_current()
+            if name is not None and self._version_of(name) != self.version:
+                self._attach(name)
+
+    def _wait_for_snapshot(self, wait_s: float) -> bool:
+        deadline = wait_s / self.interval_s
+        for _ in range(max(int(deadline), 1)):
+            name = self._read_current()
+            if name is not None:
+                try:
+                    self._attach(name)
+                    return True
+                except ValueError:
+                    # Left by an older version; wait for the writer's first publish
+                    pass
+            self._stop.wait(self.interval_s)
+        return False
+
+    def _try_lock(self) -> bool:
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _stat_feedback(self):
+        try:
+            stat = os.stat(self.analyzer.feedback_file)
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_current(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, self.CURRENT), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_current(self, name: str):
+        path = os.path.join(self.directory, self.CURRENT)
+        with open(f"{path}.tmp-{os.getpid()}", "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(f"{path}.tmp-{os.getpid()}", path)
+
+    def _current_version(self) -> Optional[int]:
+        name = self._read_current()
+        return self._version_of(name) if name is not None else None
+
+    @staticmethod
+    def _version_of(name: str) -> int:
+        return int(name[len("snapshot-"):-len(".bin")])
+
+    @staticmethod
+    def _generation_of(name: str) -> int:
+        return int(name[len("columns-"):].split(".", 1)[0])
+
+    def _column_prefix(self, generation: int) -> str:
+        return os.path.join(self.directory, f"columns-{generation:08d}")
+
+    def _append_columns(self, columns, arrays: Dict[str, np.ndarray]) -> Dict[str, any]:
+        """Append new column rows to the column files; returns their snapshot metadata
+
+        Rows are only ever appended to one store object, so a reloaded store
+        gets a new generation of files.
+        """
+        log = self._column_log
+        if log is None or log["source"] is not columns:
+            generations = [
+                self._generation_of(name) for name in os.listdir(self.directory)
+                if name.startswith("columns-")
+            ]
+            log = self._column_log = {"generation": max(generations, default=0) + 1, "source": columns, "layout": {}}
+        log["layout"] = append_columns(self._column_prefix(log["generation"]), arrays, log["layout"])
+        return {"generation": log["generation"], "layout": log["layout"]}
+
+    def _remove_old(self, version: int):
+        """Delete all but the newest `keep` snapshots and the column files only older ones used
+
+        Mapped files stay readable.
+        """
+        kept = []
+        for name in os.listdir(self.directory):
+            if name.startswith("snapshot-") and name.endswith(".bin"):
+                if self._version_of(name) <= version - self.keep:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+                else:
+                    kept.append(name)
+
+        metas = [_read_header(os.path.join(self.directory, name))["meta"] for name in kept]
+        oldest = min(meta["columns"]["generation"] for meta in metas if "columns" in meta)
+        for name in os.listdir(self.directory):
+            if name.startswith("columns-") and self._generation_of(name) < oldest:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,85 @@
+import random
+import numpy as np
+from eval import (
+    BatchCorpus, batch_bleu1, batch_f1, batch_hallucination, batch_relevance, evaluate_batch,
+    calculate_f1, calculate_relevance, detect_hallucination, simple_bleu1, original, rewrites
+)
+
+SCALAR = {
+    "bleu1": simple_bleu1,
+    "f1": calculate_f1,
+    "relevance": calculate_relevance,
+    "hallucination": detect_hallucination
+}
+
+# Words that exercise every metric: concepts, claims, numbers, stop words,
+# case and Unicode edge cases (final sigma, dotted I, non-ASCII digits)
+WORDS = [
+    "Summer", "shoes", "50%", "OFF", "sale", "Collection", "footwear", "the", "a", "and", "on",
+    "Limited", "time", "period", "free", "Shipping", "new", "arrival", "best", "seller", "award",
+    "winning", "exclusive", "customer", "favorite", "while", "supplies", "last", "discount",
+    "savings", "2024", "10", "x99y", "٣٤", "ΟΔΟΣ", "İstanbul", "☀️", "#SummerShoes", "now!", ""
+]
+SPACES = [" ", " ", " ", "  ", "\t", "\n", " ", "　"]
+
+
+def _text(rng: random.Random, length: int) -> str:
+    parts = []
+    for _ in range(length):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(SPACES))
+    return "".join(parts)
+
+
+def _pairs(seed: int, count: int):
+    rng = random.Random(seed)
+    originals = [_text(rng, rng.randint(0, 12)) for _ in range(max(count // 10, 1))]
+    return (
+        [rng.choice(originals) for _ in range(count)],
+        [_text(rng, rng.randint(0, 30)) for _ in range(count)]
+    )
+
+
+def _assert_matches_scalar(originals, rewrites_):
+    scores = evaluate_batch(originals, rewrites_)
+    for metric, scalar in SCALAR.items():
+        expected = [scalar(o, r) for o, r in zip(originals, rewrites_)]
+        # Bit-identical, not approximately equal
+        assert scores[metric].tolist() == expected, metric
+
+
+def test_batch_metrics_match_scalar():
+    _assert_matches_scalar(*_pairs(seed=7, count=3000))
+
+
+def test_batch_metrics_match_scalar_on_examples():
+    _assert_matches_scalar([original] * len(rewrites), list(rewrites.values()))
+
+
+def test_texts_containing_the_separator_are_tokenized_individually():
+    originals, rewrites_ = _pairs(seed=11, count=200)
+    rewrites_[3] = "50% off\x00 summer shoes, limited\x00time"
+    _assert_matches_scalar(originals, rewrites_)
+
+
+def test_dense_and_binary_search_lookups_agree(monkeypatch):
+    originals, rewrites_ = _pairs(seed=13, count=500)
+    dense = evaluate_batch(originals, rewrites_)
+    monkeypatch.setattr("eval._DENSE_LOOKUP_CELLS", 0)
+    searched = evaluate_batch(originals, rewrites_)
+    for metric in SCALAR:
+        assert dense[metric].tolist() == searched[metric].tolist(), metric
+
+
+def test_single_metric_helpers_and_edge_cases():
+    assert evaluate_batch([], [])["bleu1"].tolist() == []
+    originals, rewrites_ = ["", "Get 50% off", "x"], ["", "", "50% off, limited time"]
+    assert batch_bleu1(originals, rewrites_).tolist() == [simple_bleu1(o, r) for o, r in zip(originals, rewrites_)]
+    assert batch_f1(originals, rewrites_).tolist() == [calculate_f1(o, r) for o, r in zip(originals, rewrites_)]
+    assert batch_relevance(originals, rewrites_).tolist() == [
+        calculate_relevance(o, r) for o, r in zip(originals, rewrites_)
+    ]
+    assert batch_hallucination(originals, rewrites_).tolist() == [
+        detect_hallucination(o, r) for o, r in zip(originals, rewrites_)
+    ]
+    assert isinstance(BatchCorpus(["a"], ["b"]).bleu1(), np.ndarray)
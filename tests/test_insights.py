@@ -0,0 +1,79 @@
+import json
+import sys
+from datetime import datetime
+import pytest
+from feedback_analyzer import FeedbackAnalyzer
+
+# Entries around the 2025-06-27 day boundary, including one exactly on it
+ENTRIES = [
+    ("2025-06-26T10:00:00", "fun", ["Meta"], 5),
+    ("2025-06-26T23:59:59", "professional", ["Meta", "Google"], 2),
+    ("2025-06-27T00:00:00", "fun", ["Google"], 4),
+    ("2025-06-27T09:00:00", "fun", ["Meta"], 1),
+    ("2025-06-27T09:30:00", "professional", ["LinkedIn"], 3),
+    ("2025-06-27T18:00:00", "fun", ["Meta", "LinkedIn"], 5),
+    ("2025-06-30T12:00:00", "fun", ["Meta"], 2),
+]
+
+BOUNDS = [
+    (None, datetime(2025, 6, 27)),
+    (None, datetime(2025, 6, 27, 9, 15)),
+    (datetime(2025, 6, 26, 12), None),
+    (datetime(2025, 6, 27), datetime(2025, 6, 27)),
+    (datetime(2025, 6, 27, 9, 10), datetime(2025, 6, 27, 9, 40)),
+    (datetime(2025, 6, 26, 23, 59, 59), datetime(2025, 6, 30, 12)),
+]
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    path = tmp_path / "feedback_store.json"
+    path.write_text(json.dumps([
+        {"timestamp": timestamp, "ad_text": "ad", "tone": tone, "platforms": platforms,
+         "rewritten_output": "rewrite", "rating": rating}
+        for timestamp, tone, platforms, rating in ENTRIES
+    ], indent=2), encoding="utf-8")
+    return FeedbackAnalyzer(str(path))
+
+
+def _expected(start, end, tone=None, platform=None):
+    """Entries within the inclusive bounds, counted the way the trends count them"""
+    return [
+        rating for timestamp, entry_tone, platforms, rating in ENTRIES
+        if (start is None or datetime.fromisoformat(timestamp) >= start)
+        and (end is None or datetime.fromisoformat(timestamp) <= end)
+        and (tone is None or entry_tone == tone)
+        and (platform is None or platform in platforms)
+    ]
+
+
+@pytest.mark.parametrize("start,end", BOUNDS)
+@pytest.mark.parametrize("granularity", ["hour", "day", "week"])
+@pytest.mark.parametrize("tone,platform", [(None, None), ("fun", None), (None, "Meta")])
+def test_trends_use_exact_bounds(analyzer, start, end, granularity, tone, platform):
+    trends = analyzer.get_time_based_trends(granularity, start=start, end=end, tone=tone, platform=platform)
+    expected = _expected(start, end, tone, platform)
+
+    assert sum(bucket["count"] for bucket in trends.values()) == len(expected)
+    total = sum(bucket["average_rating"] * bucket["count"] for bucket in trends.values())
+    assert total == pytest.approx(sum(expected))
+
+    analysis = analyzer.analyze_patterns(tone=tone, platform=platform, start=start, end=end)
+    assert analysis.get("total_feedback", 0) == len(expected)
+
+
+def test_whole_buckets_unchanged(analyzer):
+    # Bounds on bucket edges need no recount
+    trends = analyzer.get_time_based_trends("day", start=datetime(2025, 6, 27), end=datetime(2025, 6, 27, 23, 59, 59))
+    assert trends == {"2025-06-27": {"average_rating": 13 / 4, "count": 4}}
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="enhanced_prompt_builder needs Python 3.12 f-strings")
+@pytest.mark.parametrize("start,end", BOUNDS)
+def test_insights_sections_agree(analyzer, monkeypatch, start, end):
+    import main
+    monkeypatch.setattr(main, "feedback_analyzer", analyzer)
+
+    insights = main._build_insights(None, None, start, end)
+    trend_count = sum(bucket["count"] for bucket in insights["recent_trends"].values())
+    assert insights["analysis_summary"]["total_feedback"] == trend_count == len(_expected(start, end))
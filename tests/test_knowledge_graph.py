@@ -0,0 +1,39 @@
+import json
+from enhanced_knowledge_graph import EnhancedKnowledgeGraph
+from feedback_analyzer import FeedbackAnalyzer
+
+
+def _write_store(path, rating, count=20):
+    path.write_text(json.dumps([
+        {"timestamp": f"2025-06-27T{hour:02d}:00:00", "ad_text": "ad", "tone": "fun", "platforms": ["Meta"],
+         "rewritten_output": "rewrite", "rating": rating}
+        for hour in range(count)
+    ], indent=2), encoding="utf-8")
+
+
+def _weight(graph, from_node, to_node):
+    return next(edge["weight"] for edge in graph.edges[from_node] if edge["to"] == to_node)
+
+
+def test_relearns_after_restart(tmp_path):
+    store = tmp_path / "feedback_store.json"
+    snapshot = str(tmp_path / "knowledge_graph.snapshot")
+
+    _write_store(store, rating=5)
+    graph = EnhancedKnowledgeGraph(snapshot_path=snapshot)
+    analyzer = FeedbackAnalyzer(str(store))
+    assert ("fun", "Meta") in graph.learn_from_feedback(analyzer.get_weight_table())
+    high = _weight(graph, "fun", "Meta")
+
+    # The store changes while the process is down; the new analyzer's
+    # weight table starts from the same version number
+    _write_store(store, rating=1)
+    restarted = EnhancedKnowledgeGraph(snapshot_path=snapshot)
+    assert _weight(restarted, "fun", "Meta") == high
+    table = FeedbackAnalyzer(str(store)).get_weight_table()
+    assert table.version == analyzer.get_weight_table().version
+
+    assert ("fun", "Meta") in restarted.learn_from_feedback(table)
+    assert _weight(restarted, "fun", "Meta") < high
+    # Same data: nothing to relearn
+    assert restarted.learn_from_feedback(table) == []
@@ -0,0 +1,84 @@
+import threading
+import time
+import cProfile
+import pytest
+import request_profiler
+from request_profiler import PROCESS_WIDE_CPROFILE, ProfilerBusy, RequestProfiler
+
+
+def _busy_work():
+    return sum(i * i for i in range(20000))
+
+
+def _session(profiler, **kwargs):
+    """Start a blocking session in a thread; returns the thread and its result holder"""
+    result = {}
+
+    def run():
+        try:
+            result["report"] = profiler.run(**kwargs)
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not profiler.active and "error" not in result and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return thread, result
+
+
+def _requests(profiler, count):
+    barrier = threading.Barrier(count)
+
+    def request():
+        barrier.wait()
+        with profiler.record():
+            _busy_work()
+
+    threads = [threading.Thread(target=request) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_cprofile_concurrent_requests():
+    profiler = RequestProfiler()
+    thread, result = _session(profiler, seconds=10, requests=4, mode="cprofile")
+    _requests(profiler, 4)
+    thread.join()
+
+    report = result["report"]
+    assert report["requests"] == 4
+    assert report["cprofile_scope"] == ("process" if PROCESS_WIDE_CPROFILE else "requests")
+    functions = [row["function"] for row in report["top_functions"]]
+    assert any(function.startswith("_busy_work ") for function in functions)
+    assert all("calls" in row for row in report["top_functions"])
+
+
+class _HeldProfile(cProfile.Profile):
+    """A profile that can't be enabled, as when another tool is tracing"""
+
+    def enable(self, *args, **kwargs):
+        raise ValueError("Another profiling tool is already active")
+
+
+@pytest.mark.skipif(PROCESS_WIDE_CPROFILE, reason="cProfile is per-thread before Python 3.12")
+def test_untraced_requests_not_counted(monkeypatch):
+    monkeypatch.setattr(request_profiler.cProfile, "Profile", _HeldProfile)
+    profiler = RequestProfiler()
+    thread, result = _session(profiler, seconds=0.5, requests=2, mode="cprofile")
+    _requests(profiler, 2)
+    thread.join()
+    assert result["report"]["requests"] == 0
+
+
+@pytest.mark.skipif(not PROCESS_WIDE_CPROFILE, reason="cProfile is process-wide from Python 3.12")
+def test_session_refused_while_another_profiler_runs(monkeypatch):
+    monkeypatch.setattr(request_profiler.cProfile, "Profile", _HeldProfile)
+    profiler = RequestProfiler()
+    with pytest.raises(ProfilerBusy):
+        profiler.run(seconds=1, mode="cprofile")
+    # The session lock was released
+    assert profiler.run(seconds=0.05)["requests"] == 0
@@ -0,0 +1,37 @@
+from enhanced_retriever import EnhancedRetriever
+
+OLD = "fun:\n- Use emojis\n\nmeta:\n- Keep it short\n"
+NEW = "fun:\n- Add puns\n\nmeta:\n- Keep it short\n"
+
+
+def test_reloads_edited_guidelines(tmp_path):
+    path = tmp_path / "tone_guidelines.txt"
+    path.write_text(OLD, encoding="utf-8")
+    retriever = EnhancedRetriever(str(path), reload_interval_s=0)
+    assert retriever.retrieve_guidance("fun", ["Meta"])[0]["direct_matches"]["fun"] == ["Use emojis"]
+    old_version = retriever.corpus_version
+
+    path.write_text(NEW + "\n", encoding="utf-8")
+    result, _ = retriever.retrieve_guidance("fun", ["Meta"])
+    assert result["direct_matches"]["fun"] == ["Add puns"]
+    assert retriever.corpus_version != old_version
+    assert retriever.cache_stats()["entries"] == 1
+
+
+def test_no_old_results_under_new_version(tmp_path):
+    path = tmp_path / "tone_guidelines.txt"
+    path.write_text(OLD, encoding="utf-8")
+    retriever = EnhancedRetriever(str(path), reload_interval_s=None)
+    retrieve = retriever._retrieve_with_relevance
+
+    def reload_midway(tone, platforms):
+        # The corpus changes while a retrieval of the old one is computed
+        result = retrieve(tone, platforms)
+        path.write_text(NEW, encoding="utf-8")
+        assert retriever.reload_guidelines()
+        return result
+
+    retriever._retrieve_with_relevance = reload_midway
+    assert retriever.retrieve_guidance("fun", ["Meta"])[0]["direct_matches"]["fun"] == ["Use emojis"]
+    retriever._retrieve_with_relevance = retrieve
+    assert retriever.retrieve_guidance("fun", ["Meta"])[0]["direct_matches"]["fun"] == ["Add puns"]
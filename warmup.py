@@ -0,0 +1,100 @@
+from typing import Callable, Dict, Iterable, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
+
+class WarmUp:
+    """Run start-up tasks in parallel and track their status for readiness checks
+
+    Tasks are registered with the names of the tasks they depend on and are
+    started as soon as those have finished. If a task fails, everything that
+    depends on it is skipped and the warm-up is reported as failed.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.tasks: Dict[str, Dict] = {}
+        self.status: Dict[str, Dict] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+
+    def add(self, name: str, fn: Callable[[], None], after: Iterable[str] = ()):
+        """Register a task to run once every task in `after` has finished"""
+        self.tasks[name] = {"fn": fn, "after": tuple(after)}
+        self.status[name] = {"state": "pending"}
+
+    def start(self) -> threading.Thread:
+        """Run all tasks on a background thread and return it"""
+        self.started_at = time.perf_counter()
+        thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm-up has finished; True if it succeeded"""
+        self._done.wait(timeout)
+        return self.ready
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and all(s["state"] == "done" for s in self.status.values())
+
+    def report(self) -> Dict[str, any]:
+        """Warm-up status for the readiness endpoint"""
+        if self.started_at is None:
+            state = "not_started"
+        elif not self.finished:
+            state = "warming"
+        else:
+            state = "ready" if self.ready else "failed"
+
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return {
+            "status": state,
+            "elapsed_ms": round((end - self.started_at) * 1000, 2) if self.started_at is not None else 0,
+            "tasks": {name: dict(status) for name, status in self.status.items()}
+        }
+
+    def _run(self):
+        pending = dict(self.tasks)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="warm-up") as executor:
+            while pending or running:
+                # Skip tasks whose dependencies failed, start those whose dependencies are done
+                for name, task in list(pending.items()):
+                    states = [self.status[dep]["state"] for dep in task["after"]]
+                    if any(state in ("failed", "skipped") for state in states):
+                        self.status[name] = {"state": "skipped"}
+                        del pending[name]
+                    elif all(state == "done" for state in states):
+                        self.status[name] = {"state": "running"}
+                        running[executor.submit(self._run_task, name, task["fn"])] = name
+                        del pending[name]
+
+                if not running:
+                    # Only unsatisfiable dependencies are left
+                    for name in pending:
+                        self.status[name] = {"state": "skipped", "error": "unknown dependency"}
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+
+        self.finished_at = time.perf_counter()
+        self._done.set()
+
+    def _run_task(self, name: str, fn: Callable[[], None]):
+        started = time.perf_counter()
+        try:
+            fn()
+            self.status[name] = {"state": "done"}
+        except Exception as e:
+            self.status[name] = {"state": "failed", "error": str(e)}
+        self.status[name]["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)